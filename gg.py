@@ -3,26 +3,942 @@ import json
 import re
 import time
 import csv
+from array import array
+import hashlib
+import heapq
+import math
+import shelve
+import socket
+import sqlite3
+import struct
+import tempfile
 from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from urllib.parse import urlparse, urljoin, parse_qs
 import os
 import sys
 import textwrap
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import threading
 from queue import Queue
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
 
-class YouTubeAdvancedScanner:
-    def __init__(self):
+# Декларативная схема извлечения: раздел -> поле -> пути-кандидаты по приоритету.
+# Первый элемент пути - якорный ключ, который ищется во всём дереве за один проход
+# (пробуются все его вхождения по порядку), '$' - корень переданного элемента,
+# число - индекс списка, '*' - любой элемент списка, '?ключ=значение' - фильтр узла.
+# Поля *_count / *_label берутся из числовых и accessibility-полей и не зависят от языка.
+EXTRACTION_SCHEMA = {
+    'channel': {
+        'id': [
+            'channelMetadataRenderer.externalId',
+            'c4TabbedHeaderRenderer.channelId',
+        ],
+        'name': [
+            'channelMetadataRenderer.title',
+            'c4TabbedHeaderRenderer.title',
+            'pageHeaderRenderer.pageTitle',
+        ],
+        'description': [
+            'channelMetadataRenderer.description',
+        ],
+        'subscribers': [
+            'c4TabbedHeaderRenderer.subscriberCountText.simpleText',
+            'pageHeaderViewModel.metadata.contentMetadataViewModel.metadataRows.1.metadataParts.0.accessibilityLabel',
+            'pageHeaderViewModel.metadata.contentMetadataViewModel.metadataRows.1.metadataParts.0.text.content',
+        ],
+        'video_count': [
+            'c4TabbedHeaderRenderer.videosCountText.runs.0.text',
+            'c4TabbedHeaderRenderer.videosCountText.simpleText',
+            'pageHeaderViewModel.metadata.contentMetadataViewModel.metadataRows.1.metadataParts.1.accessibilityLabel',
+            'pageHeaderViewModel.metadata.contentMetadataViewModel.metadataRows.1.metadataParts.1.text.content',
+        ],
+    },
+    'video': {
+        'title': [
+            'videoPrimaryInfoRenderer.title.runs.0.text',
+            'videoPrimaryInfoRenderer.title.simpleText',
+        ],
+        'views': [
+            'videoPrimaryInfoRenderer.viewCount.videoViewCountRenderer.viewCount.simpleText',
+            'videoPrimaryInfoRenderer.viewCount.videoViewCountRenderer.viewCount.runs.0.text',
+        ],
+        'likes': [
+            'videoPrimaryInfoRenderer.videoActions.menuRenderer.topLevelButtons.*'
+            '.segmentedLikeDislikeButtonRenderer.likeButton.toggleButtonRenderer.defaultText.simpleText',
+            'videoPrimaryInfoRenderer.videoActions.menuRenderer.topLevelButtons.*'
+            '.segmentedLikeDislikeButtonViewModel.likeButtonViewModel.likeButtonViewModel'
+            '.toggleButtonViewModel.toggleButtonViewModel.defaultButtonViewModel.buttonViewModel.title',
+        ],
+        'published': [
+            'videoPrimaryInfoRenderer.dateText.simpleText',
+        ],
+        'view_count': [
+            'videoPrimaryInfoRenderer.viewCount.videoViewCountRenderer.originalViewCount',
+        ],
+        'like_label': [
+            'videoPrimaryInfoRenderer.videoActions.menuRenderer.topLevelButtons.*'
+            '.segmentedLikeDislikeButtonRenderer.likeButton.toggleButtonRenderer'
+            '.accessibilityData.accessibilityData.label',
+            'videoPrimaryInfoRenderer.videoActions.menuRenderer.topLevelButtons.*'
+            '.segmentedLikeDislikeButtonRenderer.likeButton.toggleButtonRenderer'
+            '.defaultText.accessibility.accessibilityData.label',
+            'videoPrimaryInfoRenderer.videoActions.menuRenderer.topLevelButtons.*'
+            '.segmentedLikeDislikeButtonViewModel.likeButtonViewModel.likeButtonViewModel'
+            '.toggleButtonViewModel.toggleButtonViewModel.defaultButtonViewModel.buttonViewModel.accessibilityText',
+        ],
+        'comment_count': [
+            'engagementPanelTitleHeaderRenderer.contextualInfo.runs.0.text',
+        ],
+        'comments': [
+            'commentsEntryPointHeaderRenderer.commentCount.simpleText',
+            'engagementPanelTitleHeaderRenderer.contextualInfo.runs.0.text',
+        ],
+    },
+    'comments': {
+        'continuation': [
+            'itemSectionRenderer.?sectionIdentifier=comment-item-section.contents.*'
+            '.continuationItemRenderer.continuationEndpoint.continuationCommand.token',
+            'twoColumnWatchNextResults.results.results.contents.*.itemSectionRenderer.contents.*'
+            '.continuationItemRenderer.continuationEndpoint.continuationCommand.token',
+        ],
+    },
+    'playlist': {
+        'name': [
+            'playlistHeaderRenderer.title.simpleText',
+            'playlistMetadataRenderer.title',
+            'pageHeaderRenderer.pageTitle',
+        ],
+        'description': [
+            'playlistMetadataRenderer.description',
+        ],
+        'video_count': [
+            'playlistHeaderRenderer.numVideosText.runs.0.text',
+            'playlistSidebarPrimaryInfoRenderer.stats.0.runs.0.text',
+        ],
+    },
+    'browse': {
+        'continuation': [
+            'continuationItemRenderer.continuationEndpoint.continuationCommand.token',
+        ],
+    },
+    'comment_renderer': {
+        'comment_id': ['$.commentId'],
+        'author': ['$.authorText.simpleText', '$.authorText.runs.0.text'],
+        'likes': ['$.voteCount.simpleText'],
+        'published': ['$.publishedTimeText.runs.0.text', '$.publishedTimeText.simpleText'],
+    },
+    'comment_entity': {
+        'comment_id': ['$.properties.commentId'],
+        'author': ['$.author.displayName'],
+        'text': ['$.properties.content.content'],
+        'likes': ['$.toolbar.likeCountNotliked', '$.toolbar.likeCountA11y'],
+        'published': ['$.properties.publishedTime'],
+    },
+    'continuation_item': {
+        'token': [
+            '$.continuationEndpoint.continuationCommand.token',
+            '$.button.buttonRenderer.command.continuationCommand.token',
+        ],
+    },
+    'player': {
+        'view_count': [
+            'videoDetails.viewCount',
+            'microformat.playerMicroformatRenderer.viewCount',
+        ],
+        'title': [
+            'videoDetails.title',
+        ],
+    },
+    'video_owner': {
+        'name': [
+            'videoOwnerRenderer.title.runs.0.text',
+            'videoOwnerRenderer.title.simpleText',
+        ],
+        'subscribers': [
+            'videoOwnerRenderer.subscriberCountText.simpleText',
+        ],
+        'id': [
+            'videoOwnerRenderer.navigationEndpoint.browseEndpoint.browseId',
+        ],
+    },
+    'short_item': {
+        'id': [
+            '$.videoId',
+            '$.onTap.innertubeCommand.reelWatchEndpoint.videoId',
+        ],
+        'title': [
+            '$.headline.simpleText',
+            '$.overlayMetadata.primaryText.content',
+        ],
+        'views': [
+            '$.viewCountText.simpleText',
+            '$.overlayMetadata.secondaryText.content',
+        ],
+    },
+    'video_item': {
+        'title': [
+            '$.title.runs.0.text',
+            '$.title.simpleText',
+            '$.title',
+        ],
+        'views': [
+            '$.viewCountText.simpleText',
+        ],
+        'published': [
+            '$.publishedTimeText.simpleText',
+        ],
+        'duration': [
+            '$.lengthText.simpleText',
+        ],
+    },
+}
+
+
+# Сокращённые счётчики ("1.2M", "1,2 млн", "1.2 million", "1,5 Mio.") - точное число из них не получить:
+# единица-множитель или дробная часть из 1-2 цифр перед словом
+ABBREVIATED_COUNT = re.compile(
+    r'\d\s*(?:[kmb]\b|тыс|млн|млрд|миллион|миллиард|thousand|million|billion)|\d[.,]\d{1,2}(?!\d)\s*[^\W\d]',
+    re.IGNORECASE)
+
+# Элементы Shorts: у них нет поля title, поэтому они собираются как якоря
+SHORTS_ITEM_KEYS = ('reelItemRenderer', 'shortsLockupViewModel')
+
+
+class ExtractionSchema:
+    """Скомпилированная схема извлечения со статистикой попаданий по полям"""
+
+    def __init__(self, schema: Dict[str, Dict[str, List[str]]], extra_anchors: Iterable[str] = ()):
+        self.sections = {}
+        self.anchor_keys = set(extra_anchors)
+        self._stats = {}
+        self._lock = threading.Lock()
+
+        for section, fields in schema.items():
+            compiled = []
+            for field, paths in fields.items():
+                accessors = tuple(self._compile_path(path) for path in paths)
+                compiled.append((field, tuple(paths), accessors))
+                # Счётчики попаданий по каждому кандидату + промахи в конце
+                self._stats[f"{section}.{field}"] = [0] * (len(paths) + 1)
+                for path in paths:
+                    anchor = path.split('.', 1)[0]
+                    if anchor != '$':
+                        self.anchor_keys.add(anchor)
+            self.sections[section] = compiled
+
+    def _compile_path(self, path: str):
+        """Компилирует путь в функцию доступа от словаря якорей"""
+        anchor, *steps = path.split('.')
+        getter = self._compile_steps([int(s) if s.isdigit() else s for s in steps])
+
+        def accessor(anchors):
+            for node in anchors.get(anchor, ()):
+                value = getter(node)
+                if value is not None:
+                    return value
+            return None
+
+        return accessor
+
+    def _compile_steps(self, steps: List):
+        """Собирает цепочку замыканий для шагов пути"""
+        if not steps:
+            return lambda node: node
+
+        step, rest = steps[0], self._compile_steps(steps[1:])
+
+        if step == '*':
+            def getter(node):
+                if isinstance(node, list):
+                    for item in node:
+                        value = rest(item)
+                        if value is not None:
+                            return value
+                return None
+        elif isinstance(step, str) and step.startswith('?'):
+            key, expected = step[1:].split('=', 1)
+
+            def getter(node):
+                if isinstance(node, dict) and node.get(key) == expected:
+                    return rest(node)
+                return None
+        elif isinstance(step, int):
+            def getter(node):
+                if isinstance(node, list) and step < len(node):
+                    return rest(node[step])
+                return None
+        else:
+            def getter(node):
+                if isinstance(node, dict):
+                    value = node.get(step)
+                    if value is not None:
+                        return rest(value)
+                return None
+
+        return getter
+
+    def scan(self, data, collect_items: bool = False) -> Tuple[Dict, List]:
+        """Один проход по дереву: вхождения якорей по порядку и (опционально) элементы видео"""
+        anchors = {}
+        items = []
+        wanted = self.anchor_keys
+        stack = [data]
+
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                if collect_items and 'videoId' in node and 'title' in node:
+                    items.append(node)
+                children = []
+                for key, value in node.items():
+                    if key in wanted and value:
+                        anchors.setdefault(key, []).append(value)
+                    if isinstance(value, (dict, list)):
+                        children.append(value)
+                stack.extend(reversed(children))
+            elif isinstance(node, list):
+                stack.extend(reversed([v for v in node if isinstance(v, (dict, list))]))
+
+        return anchors, items
+
+    def extract(self, section: str, anchors: Dict) -> Dict:
+        """Применяет поля раздела к найденным якорям с учётом порядка кандидатов"""
+        result = {}
+        for field, paths, accessors in self.sections[section]:
+            counters = self._stats[f"{section}.{field}"]
+            for index, accessor in enumerate(accessors):
+                value = accessor(anchors)
+                if value is not None and not isinstance(value, (dict, list)):
+                    result[field] = value
+                    break
+            else:
+                index = len(accessors)
+            with self._lock:
+                counters[index] += 1
+        return result
+
+    def extract_item(self, section: str, item: Dict) -> Dict:
+        """Применяет раздел схемы к отдельному элементу ('$' - сам элемент)"""
+        return self.extract(section, {'$': [item]})
+
+    def extract_root(self, section: str, data: Dict) -> Dict:
+        """Применяет раздел схемы, когда якоря - ключи верхнего уровня data"""
+        return self.extract(section, {key: [value] for key, value in data.items()})
+
+    def hit_rates(self) -> Dict[str, Dict]:
+        """Статистика попаданий: доля успешных извлечений и срабатывания каждого пути"""
+        report = {}
+        with self._lock:
+            for section, fields in self.sections.items():
+                for field, paths, _ in fields:
+                    counters = self._stats[f"{section}.{field}"]
+                    total = sum(counters)
+                    hits = total - counters[-1]
+                    report[f"{section}.{field}"] = {
+                        'hits': hits,
+                        'misses': counters[-1],
+                        'hit_rate': hits / total if total else 0.0,
+                        'by_path': dict(zip(paths, counters[:-1])),
+                    }
+        return report
+
+
+# Ключи, поддеревья которых материализует выборочный разбор ytInitialData
+SELECTIVE_PARSE_KEYS = (
+    'videoPrimaryInfoRenderer',
+    'videoOwnerRenderer',
+    'commentsEntryPointHeaderRenderer',
+    'engagementPanelTitleHeaderRenderer',
+    'channelMetadataRenderer',
+    'c4TabbedHeaderRenderer',
+    'pageHeaderRenderer',
+    'playlistHeaderRenderer',
+    'playlistMetadataRenderer',
+    'playlistSidebarPrimaryInfoRenderer',
+    'videoRenderer',
+    'gridVideoRenderer',
+    'playlistVideoRenderer',
+    'continuationItemRenderer',
+) + SHORTS_ITEM_KEYS
+
+
+class SelectiveJsonParser:
+    """Выборочный разбор JSON-текста без построения полного дерева.
+    
+    Текст просматривается как поток событий "ключ объекта": регулярное выражение
+    перескакивает к следующему интересующему ключу, и только его значение
+    разбирается в объекты. Всё между ними пропускается без выделения памяти.
+    Внутри JSON-строк кавычки всегда экранированы, поэтому совпадение
+    с неэкранированной кавычкой - это настоящий ключ.
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys = tuple(keys)
+        alternatives = '|'.join(re.escape(key) for key in sorted(self.keys, key=len, reverse=True))
+        self._key_re = re.compile(rf'(?<!\\)"({alternatives})"\s*:\s*')
+        self._decoder = json.JSONDecoder()
+
+    def parse(self, text: str, start: int = 0, end: Optional[int] = None) -> List[Dict]:
+        """Фрагменты {ключ: значение} в порядке появления в тексте"""
+        fragments = []
+        end = len(text) if end is None else end
+        pos = start
+
+        while True:
+            match = self._key_re.search(text, pos, end)
+            if not match:
+                break
+            try:
+                value, pos = self._decoder.raw_decode(text, match.end())
+            except ValueError:
+                pos = match.end()
+                continue
+            # Вложенные совпадения уже внутри value - продолжаем после него
+            fragments.append({match.group(1): value})
+
+        return fragments
+
+
+class BloomFilter:
+    """Компактный фильтр Блума с сохранением в файл (только проверка членства)"""
+
+    _HEADER = struct.Struct('<QI')
+
+    def __init__(self, capacity: int = 10_000_000, error_rate: float = 0.001,
+                 path: Optional[str] = None):
+        self.path = path
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                self.size, self.hashes = self._HEADER.unpack(f.read(self._HEADER.size))
+                self.bits = bytearray(f.read())
+        else:
+            self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+            self.hashes = max(1, round(self.size / capacity * math.log(2)))
+            self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        """Позиции битов по двойному хешированию"""
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def save(self):
+        """Атомарно записывает фильтр на диск"""
+        if not self.path:
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(self._HEADER.pack(self.size, self.hashes))
+            f.write(self.bits)
+        os.replace(tmp_path, self.path)
+
+
+class VideoDedupIndex:
+    """Индекс уже загруженных видео по каноническому ID.
+    
+    Всегда держит в памяти то, что загружено в текущем запуске. Дополнительно
+    может опираться на файл: ключи с деталями (shelve, с окном свежести) или
+    фильтр Блума (*.bloom) - только факт загрузки, без деталей.
+    """
+
+    def __init__(self, path: Optional[str] = None, freshness_hours: Optional[float] = None,
+                 bloom_capacity: int = 10_000_000):
+        self.freshness = freshness_hours * 3600 if freshness_hours else None
+        self._memory = {}
+        self._lock = threading.Lock()
+        self._store = None
+        self._bloom = None
+        self.hits = 0
+        
+        if path and path.endswith('.bloom'):
+            self._bloom = BloomFilter(capacity=bloom_capacity, path=path)
+        elif path:
+            self._store = shelve.open(path)
+
+    def _is_fresh(self, fetched_at: float) -> bool:
+        return self.freshness is None or time.time() - fetched_at < self.freshness
+
+    def lookup(self, video_id: str) -> Tuple[bool, Optional[Dict]]:
+        """(уже загружено и свежо, сохранённые детали или None)"""
+        with self._lock:
+            entry = self._memory.get(video_id)
+            if entry is None and self._store is not None:
+                entry = self._store.get(video_id)
+                if entry is not None:
+                    self._memory[video_id] = entry
+            
+            if entry is not None and self._is_fresh(entry[0]):
+                self.hits += 1
+                return True, entry[1]
+            
+            if entry is None and self._bloom is not None and video_id in self._bloom:
+                self.hits += 1
+                return True, None
+        
+        return False, None
+
+    def add(self, video_id: str, details: Dict):
+        """Отмечает видео как загруженное"""
+        entry = (time.time(), details)
+        with self._lock:
+            self._memory[video_id] = entry
+            if self._store is not None:
+                self._store[video_id] = entry
+            if self._bloom is not None:
+                self._bloom.add(video_id)
+
+    def close(self):
+        """Сбрасывает файловую часть индекса на диск"""
+        with self._lock:
+            if self._store is not None:
+                self._store.close()
+                self._store = None
+            if self._bloom is not None:
+                self._bloom.save()
+
+
+# Одно скомпилированное выражение для классификации и канонизации URL без сети
+URL_PATTERN = re.compile(r"""
+    ^(?:https?://)?(?:(?:www|m|music)\.)?
+    (?:
+        youtu\.be/(?P<short>[\w-]{11})
+      | youtube(?:-nocookie)?\.com/
+        (?:
+            (?:watch\?(?:[^\#\s]*&)?v=|embed/|shorts/|live/|v/)(?P<video>[\w-]{11})
+          | playlist\?(?:[^\#\s]*&)?list=(?P<playlist>[\w-]+)
+          | channel/(?P<channel_id>UC[\w-]{22})
+          | @(?P<handle>[\w.%-]+)
+          | (?P<legacy_kind>c|user)/(?P<legacy>[\w.%-]+)
+        )
+    )
+    (?![\w-])
+""", re.IGNORECASE | re.VERBOSE)
+
+
+def classify_url(line: str) -> Optional[Tuple[str, str, str]]:
+    """(тип, канонический ключ, канонический URL) или None для нераспознанной строки"""
+    match = URL_PATTERN.match(line.strip())
+    if not match:
+        return None
+    
+    short, video_id, playlist_id, channel_id, handle, legacy_kind, legacy = match.groups()
+    video_id = video_id or short
+    if video_id:
+        return 'video', f"video:{video_id}", f"https://www.youtube.com/watch?v={video_id}"
+    if playlist_id:
+        return 'playlist', f"playlist:{playlist_id}", f"https://www.youtube.com/playlist?list={playlist_id}"
+    if channel_id:
+        return 'channel', f"channel:{channel_id}", f"https://www.youtube.com/channel/{channel_id}"
+    if handle:
+        handle = handle.lower()
+        return 'channel', f"channel:@{handle}", f"https://www.youtube.com/@{handle}"
+    
+    path = f"{legacy_kind.lower()}/{legacy.lower()}"
+    return 'channel', f"channel:{path}", f"https://www.youtube.com/{path}"
+
+
+class IngestReport:
+    """Итоги потокового приёма URL; битые строки собираются пачкой"""
+
+    def __init__(self, max_samples: int = 20):
+        self.max_samples = max_samples
+        self.lines = 0
+        self.accepted = 0
+        self.duplicates = 0
+        self.malformed = 0
+        self.malformed_samples = []
+        self.by_kind = {}
+
+    def add_malformed(self, lineno: int, line: str):
+        self.malformed += 1
+        if len(self.malformed_samples) < self.max_samples:
+            self.malformed_samples.append((lineno, line.strip()[:120]))
+
+    def display(self):
+        print(f"\n📥 Прочитано строк: {self.lines:,}")
+        print(f"   ✅ Принято: {self.accepted:,} "
+              + ", ".join(f"{kind}: {count:,}" for kind, count in sorted(self.by_kind.items())))
+        print(f"   ♻️  Дубликатов: {self.duplicates:,}")
+        if self.malformed:
+            print(f"   ⚠️  Нераспознанных строк: {self.malformed:,}")
+            for lineno, line in self.malformed_samples:
+                print(f"      строка {lineno}: {line}")
+            if self.malformed > len(self.malformed_samples):
+                print(f"      ... и ещё {self.malformed - len(self.malformed_samples):,}")
+
+
+def iter_ingested_urls(filename: str, report: Optional[IngestReport] = None,
+                       seen=None) -> Iterator[Tuple[str, str, str]]:
+    """Лениво читает файл URL: классифицирует, канонизирует и отсеивает дубликаты.
+    
+    seen - любое множество с add/in (по умолчанию set; для огромных файлов
+    подойдёт BloomFilter). Сетевых запросов не делает.
+    """
+    report = report if report is not None else IngestReport()
+    seen = seen if seen is not None else set()
+    
+    with open(filename, 'r', encoding='utf-8', errors='replace') as f:
+        for lineno, line in enumerate(f, 1):
+            report.lines += 1
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            
+            classified = classify_url(line)
+            if classified is None:
+                report.add_malformed(lineno, line)
+                continue
+            
+            kind, key, url = classified
+            if key in seen:
+                report.duplicates += 1
+                continue
+            seen.add(key)
+            
+            report.accepted += 1
+            report.by_kind[kind] = report.by_kind.get(kind, 0) + 1
+            yield kind, key, url
+
+
+def benchmark_ingestion(lines: int = 5_000_000, filename: Optional[str] = None) -> float:
+    """Замер скорости приёма URL (строк/сек) на синтетическом файле"""
+    templates = (
+        'https://www.youtube.com/watch?v={vid}',
+        'youtu.be/{vid}?t=42',
+        'https://youtube.com/embed/{vid}',
+        'https://m.youtube.com/watch?feature=share&v={vid}',
+        'https://www.youtube.com/shorts/{vid}',
+        'https://www.youtube.com/@Channel{n}/videos',
+        'https://www.youtube.com/playlist?list=PL{n:030d}',
+        'https://www.youtube.com/channel/UC{n:022d}',
+        'not a url {n}',
+    )
+    
+    cleanup = filename is None
+    if filename is None:
+        fd, filename = tempfile.mkstemp(suffix='.txt')
+        os.close(fd)
+    
+    try:
+        with open(filename, 'w', encoding='utf-8') as f:
+            for n in range(lines):
+                # ~половина ID повторяется, чтобы нагрузить дедупликацию
+                vid = f"{n % (lines // 2 + 1):011d}"
+                f.write(templates[n % len(templates)].format(vid=vid, n=n % 100_000) + '\n')
+        
+        report = IngestReport()
+        start = time.perf_counter()
+        for _ in iter_ingested_urls(filename, report):
+            pass
+        elapsed = time.perf_counter() - start
+    finally:
+        if cleanup:
+            os.remove(filename)
+    
+    speed = report.lines / elapsed if elapsed else 0.0
+    report.display()
+    print(f"   ⚡ {speed:,.0f} строк/сек ({elapsed:.1f} сек)")
+    return speed
+
+
+class RequestBudget:
+    """Глобальный бюджет запросов (token bucket), общий для всех потоков"""
+
+    def __init__(self, requests_per_minute: float = 60, burst: int = 5):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.spent = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Блокирует, пока в бюджете не появится запрос"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.spent += 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class Egress:
+    """Точка выхода в сеть: своя сессия, прокси, заголовки и cookies"""
+
+    def __init__(self, name: str, proxy: Optional[str] = None, headers: Optional[Dict] = None,
+                 cookies: Optional[Dict] = None):
+        self.name = name
         self.session = requests.Session()
-        self.session.headers.update({
+        if headers:
+            self.session.headers.update(headers)
+        if proxy:
+            self.session.proxies.update({'http': proxy, 'https': proxy})
+        if cookies:
+            self.session.cookies.update(cookies)
+        
+        self.error_rate = 0.0
+        self.cooldown_until = 0.0
+        self.throttled_in_row = 0
+        self.last_used = 0.0
+        self.requests = 0
+
+    def score(self, now: float, half_life: float = 300) -> float:
+        """Доля ошибок, затухающая со временем - простаивающий выход снова пробуется"""
+        return self.error_rate * 0.5 ** ((now - self.last_used) / half_life)
+
+    def record(self, status: Optional[int], cooldown_base: float, max_cooldown: float):
+        """Обновляет здоровье по итогу запроса (status=None - сетевая ошибка)"""
+        failed = status is None or status == 429 or status >= 500
+        # Скользящая доля ошибок по последним ~10 запросам
+        self.error_rate = 0.9 * self.error_rate + (0.1 if failed else 0.0)
+        
+        if status == 429:
+            self.throttled_in_row += 1
+            cooldown = min(max_cooldown, cooldown_base * 2 ** (self.throttled_in_row - 1))
+            self.cooldown_until = time.monotonic() + cooldown
+            print(f"🧊 Выход {self.name} получил 429 - пауза {cooldown:.0f} сек")
+        elif status is not None and status < 500:
+            self.throttled_in_row = 0
+
+
+class EgressPool:
+    """Пул точек выхода с учётом здоровья: round robin среди самых здоровых,
+    автоматическая пауза для выхода, начавшего отвечать 429.
+    """
+
+    def __init__(self, egresses: List[Egress], cooldown_base: float = 60, max_cooldown: float = 1800):
+        if not egresses:
+            raise ValueError('Пул выходов не может быть пустым')
+        self.egresses = egresses
+        self.cooldown_base = cooldown_base
+        self.max_cooldown = max_cooldown
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, path: str, base_headers: Dict) -> 'EgressPool':
+        """Собирает пул из JSON: [{"name", "proxy", "headers", "cookies"}, ...]"""
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        
+        egresses = []
+        for i, item in enumerate(config):
+            headers = dict(base_headers)
+            headers.update(item.get('headers', {}))
+            egresses.append(Egress(item.get('name', f"egress-{i}"), item.get('proxy'),
+                                   headers, item.get('cookies')))
+        return cls(egresses)
+
+    def acquire(self, exclude: Iterable[Egress] = ()) -> Egress:
+        """Выбирает выход: не на паузе, с наименьшей долей ошибок, давнее всех использованный"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                candidates = [e for e in self.egresses if e not in exclude] or self.egresses
+                ready = [e for e in candidates if e.cooldown_until <= now]
+                if ready:
+                    # Округление долей ошибок даёт честный round robin среди равно здоровых
+                    egress = min(ready, key=lambda e: (round(e.score(now), 1), e.last_used))
+                    egress.last_used = now
+                    egress.requests += 1
+                    return egress
+                wait = min(e.cooldown_until for e in candidates) - now
+            time.sleep(max(wait, 0.05))
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Запрос через пул; при 429 или сетевой ошибке пробует другие выходы"""
+        tried = []
+        while True:
+            egress = self.acquire(exclude=tried)
+            tried.append(egress)
+            try:
+                response = egress.session.request(method, url, **kwargs)
+            except requests.RequestException:
+                egress.record(None, self.cooldown_base, self.max_cooldown)
+                if len(tried) >= len(self.egresses):
+                    raise
+                continue
+            
+            egress.record(response.status_code, self.cooldown_base, self.max_cooldown)
+            if response.status_code == 429 and len(tried) < len(self.egresses):
+                continue
+            return response
+
+    def health(self) -> List[Dict]:
+        now = time.monotonic()
+        return [{
+            'name': e.name,
+            'requests': e.requests,
+            'error_rate': round(e.error_rate, 3),
+            'cooldown': max(0.0, round(e.cooldown_until - now, 1)),
+        } for e in self.egresses]
+
+    def display_health(self):
+        print("\n🌐 Выходы:")
+        for item in self.health():
+            state = f"пауза {item['cooldown']:.0f} сек" if item['cooldown'] else "активен"
+            print(f"   {item['name']}: запросов {item['requests']}, "
+                  f"доля ошибок {item['error_rate']:.0%}, {state}")
+
+
+def check_egress(requests_count: int = 40) -> Dict[str, int]:
+    """Проверка пула на локальных заглушках прокси: два здоровых, один отвечает 429, один недоступен"""
+    
+    class StandInProxy(BaseHTTPRequestHandler):
+        def do_GET(self):
+            status = self.server.status
+            body = self.server.name.encode()
+            self.send_response(status)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass
+    
+    servers = []
+    for name, status in (('healthy-1', 200), ('healthy-2', 200), ('throttled', 429)):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StandInProxy)
+        server.name, server.status = name, status
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    
+    # Порт, который точно никто не слушает
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        dead_port = sock.getsockname()[1]
+    
+    proxies = [(s.name, f"http://127.0.0.1:{s.server_address[1]}") for s in servers]
+    proxies.append(('dead', f"http://127.0.0.1:{dead_port}"))
+    pool = EgressPool([Egress(name, proxy) for name, proxy in proxies], cooldown_base=30)
+    
+    served = {}
+    try:
+        for _ in range(requests_count):
+            response = pool.request('GET', 'http://www.youtube.com/', timeout=2)
+            served[response.text] = served.get(response.text, 0) + 1
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+    
+    print(f"\n🧪 Ответы по выходам: {served}")
+    pool.display_health()
+    return served
+
+
+# Вкладки канала, которые перечисляются параллельно
+CHANNEL_TABS = ('videos', 'shorts', 'streams')
+
+# Единицы "N ... назад" в секундах: префиксы основ на русском и английском
+AGE_UNITS = (
+    ('сек', 1), ('second', 1),
+    ('мин', 60), ('minute', 60),
+    ('час', 3600), ('hour', 3600),
+    ('дн', 86400), ('день', 86400), ('day', 86400),
+    ('недел', 604800), ('week', 604800),
+    ('месяц', 2592000), ('month', 2592000),
+    ('год', 31536000), ('лет', 31536000), ('year', 31536000),
+)
+
+AGE_PATTERN = re.compile(r'(\d+)\s*([^\W\d_]+)')
+
+
+def parse_relative_age(text: Optional[str]) -> Optional[float]:
+    """Возраст публикации в секундах по подписи ("3 дня назад", "Streamed 2 weeks ago")"""
+    if not text:
+        return None
+    for number, word in AGE_PATTERN.findall(text.lower()):
+        for prefix, seconds in AGE_UNITS:
+            if word.startswith(prefix):
+                return int(number) * seconds
+    return None
+
+
+def merge_by_age(streams: List[Iterator[Tuple[Optional[float], Dict]]]) -> Iterator[Dict]:
+    """Сливает потоки (возраст, видео), каждый от новых к старым, в один поток от новых к старым.
+    
+    Элемент без даты наследует возраст предыдущего элемента своего потока.
+    Поток, в котором дат ещё не было (Shorts), идёт вровень со средней
+    датированной вкладкой: его очередной элемент выходит, когда датированных
+    элементов отдано не меньше, чем (взято из него) x (число датированных потоков).
+    """
+    streams = list(streams)
+    heads = [next(stream, None) for stream in streams]
+    last_age = [None] * len(streams)
+    taken = [0] * len(streams)
+    dated_taken = 0
+    
+    while any(head is not None for head in heads):
+        for i, head in enumerate(heads):
+            if head is not None and head[0] is None and last_age[i] is not None:
+                heads[i] = (last_age[i], head[1])
+        
+        active = [i for i, head in enumerate(heads) if head is not None]
+        dated = [i for i in active if heads[i][0] is not None]
+        due = [i for i in active if heads[i][0] is None and taken[i] * len(dated) <= dated_taken]
+        
+        if due:
+            i = min(due, key=lambda i: (taken[i], i))
+        else:
+            i = min(dated, key=lambda i: (heads[i][0], taken[i], i))
+        
+        age, video = heads[i]
+        if age is not None:
+            last_age[i] = age
+            dated_taken += 1
+        taken[i] += 1
+        heads[i] = next(streams[i], None)
+        yield video
+
+
+class YouTubeAdvancedScanner:
+    def __init__(self, accept_language: str = 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7',
+                 selective_parse: bool = False, egress_config: Optional[str] = None):
+        self.accept_language = accept_language
+        # Выборочный разбор: из ytInitialData строятся только нужные поддеревья
+        self.selective_parse = selective_parse
+        self._selective_parsers = {}
+        headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept-Language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7',
+            'Accept-Language': accept_language,
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        })
+        }
+        # Весь трафик идёт через пул выходов; по умолчанию в нём один прямой выход
+        if egress_config:
+            self.egress = EgressPool.from_config(egress_config, headers)
+        else:
+            self.egress = EgressPool([Egress('direct', headers=headers)])
+        self.session = self.egress.egresses[0].session
         self.results = []
         self.videos_queue = Queue()
         self.running = False
+        self.extraction = ExtractionSchema(EXTRACTION_SCHEMA, extra_anchors=SHORTS_ITEM_KEYS)
+        # Индекс уже загруженных видео, общий для всех видов сканирования
+        self.dedup = VideoDedupIndex()
+        # Начала лент комментариев, снятые при загрузке страниц видео: id -> (токен, клиент)
+        self._comment_starts = {}
+        # Необязательный глобальный бюджет запросов (используется демоном мониторинга)
+        self.request_budget = None
+        # Файл снимков показателей для аналитики роста (None - не записывать)
+        self.snapshots_path = None
+        self._analytics = None
         
     def normalize_url(self, url: str) -> str:
         """Автоматически добавляет https:// если нужно"""
@@ -37,7 +953,7 @@ class YouTubeAdvancedScanner:
         
         # Если это канал без @ или channel
         if 'youtube.com/' in url and not any(x in url for x in ['@', 'channel/', 'user/', 'c/']):
-            if '/watch?v=' in url:
+            if '/watch?' in url or '/embed/' in url or '/shorts/' in url:
                 # Это видео - оставляем как есть
                 pass
             else:
@@ -45,7 +961,10 @@ class YouTubeAdvancedScanner:
                 if '/feed/' in url:
                     pass
                 elif '/playlist' in url:
-                    pass
+                    # Приводим плейлист к каноническому виду
+                    playlist_id = self.extract_playlist_id_from_url(url)
+                    if playlist_id:
+                        url = f"https://www.youtube.com/playlist?list={playlist_id}"
                 else:
                     print(f"⚠️  Непонятный URL формат: {url}")
         
@@ -55,7 +974,7 @@ class YouTubeAdvancedScanner:
         """Определяет тип URL: канал, видео или плейлист"""
         url_lower = url.lower()
         
-        if '/watch?v=' in url:
+        if self.extract_video_id_from_url(url):
             return 'video'
         elif '/channel/' in url or '/@' in url or '/user/' in url or '/c/' in url:
             return 'channel'
@@ -86,7 +1005,8 @@ class YouTubeAdvancedScanner:
         
         # Пробуем получить ID через API-like запрос
         try:
-            response = self.session.get(url, timeout=5)
+            self._throttle()
+            response = self.egress.request('GET', url, timeout=5)
             # Ищем channelId в странице
             match = re.search(r'"channelId":"([^"]+)"', response.text)
             if match:
@@ -99,9 +1019,10 @@ class YouTubeAdvancedScanner:
     def extract_video_id_from_url(self, url: str) -> Optional[str]:
         """Извлекает ID видео из URL"""
         patterns = [
-            r'youtube\.com/watch\?v=([^&]+)',
-            r'youtu\.be/([^?]+)',
-            r'youtube\.com/embed/([^?]+)',
+            r'youtube\.com/watch\?(?:.*&)?v=([\w-]+)',
+            r'youtu\.be/([\w-]+)',
+            r'youtube\.com/embed/([\w-]+)',
+            r'youtube\.com/shorts/([\w-]+)',
         ]
         
         for pattern in patterns:
@@ -111,37 +1032,149 @@ class YouTubeAdvancedScanner:
         
         return None
     
+    def extract_playlist_id_from_url(self, url: str) -> Optional[str]:
+        """Извлекает ID плейлиста из URL"""
+        match = re.search(r'[?&]list=([^&#]+)', url)
+        if match:
+            return match.group(1)
+        
+        return None
+    
+    def canonical_key(self, url: str) -> Optional[str]:
+        """Канонический ключ URL для дедупликации (без сетевых запросов)"""
+        classified = classify_url(url)
+        return classified[1] if classified else None
+    
     def get_page_json(self, url: str) -> Optional[Dict]:
         """Получает JSON данные со страницы"""
+        html = self._fetch_page(url)
+        if html is None:
+            return None
+        return self._parse_initial_data(html)
+    
+    def _throttle(self):
+        """Ждёт разрешения у глобального бюджета запросов, если он задан"""
+        if self.request_budget is not None:
+            self.request_budget.acquire()
+    
+    def _fetch_page(self, url: str) -> Optional[str]:
+        """Загружает HTML страницы"""
         try:
-            response = self.session.get(url, timeout=10)
+            self._throttle()
+            response = self.egress.request('GET', url, timeout=10)
             
             if response.status_code != 200:
                 print(f"❌ HTTP ошибка {response.status_code}")
                 return None
             
-            # Ищем основной JSON
-            patterns = [
-                r'var ytInitialData\s*=\s*({.*?});',
-                r'window\["ytInitialData"\]\s*=\s*({.*?});',
-                r'ytInitialData\s*=\s*({.*?});',
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, response.text, re.DOTALL)
-                if match:
-                    try:
-                        return json.loads(match.group(1))
-                    except:
-                        continue
+            return response.text
             
+        except Exception as e:
+            print(f"❌ Ошибка загрузки: {e}")
             return None
+    
+    def _parse_initial_data(self, html: str, extra_keys: Tuple[str, ...] = ()) -> Optional[Dict]:
+        """Достаёт ytInitialData из HTML"""
+        if self.selective_parse:
+            return self._parse_initial_data_selective(html, extra_keys)
+        
+        # Ищем основной JSON
+        patterns = [
+            r'var ytInitialData\s*=\s*({.*?});',
+            r'window\["ytInitialData"\]\s*=\s*({.*?});',
+            r'ytInitialData\s*=\s*({.*?});',
+        ]
+        
+        for pattern in patterns:
+            match = re.search(pattern, html, re.DOTALL)
+            if match:
+                try:
+                    return json.loads(match.group(1))
+                except:
+                    continue
+        
+        return None
+    
+    def _parse_innertube_config(self, html: str) -> Dict:
+        """Достаёт из HTML параметры клиента для запросов youtubei"""
+        config = {
+            'api_key': None,
+            'client_version': '2.20240101.00.00',
+            'visitor_data': None,
+        }
+        for field, key in (('api_key', 'INNERTUBE_API_KEY'),
+                           ('client_version', 'INNERTUBE_CLIENT_VERSION'),
+                           ('visitor_data', 'VISITOR_DATA')):
+            match = re.search(rf'"{key}"\s*:\s*"([^"]+)"', html)
+            if match:
+                config[field] = match.group(1)
+        return config
+    
+    def _innertube_post(self, endpoint: str, continuation: str, config: Dict) -> Optional[Dict]:
+        """Запрашивает следующую страницу по continuation-токену через youtubei"""
+        client = {
+            'clientName': 'WEB',
+            'clientVersion': config.get('client_version'),
+            'hl': self.accept_language.split(',')[0].split('-')[0],
+        }
+        if config.get('visitor_data'):
+            client['visitorData'] = config['visitor_data']
+        
+        params = {'prettyPrint': 'false'}
+        if config.get('api_key'):
+            params['key'] = config['api_key']
+        
+        try:
+            self._throttle()
+            response = self.egress.request(
+                'POST',
+                f"https://www.youtube.com/youtubei/v1/{endpoint}",
+                params=params,
+                json={'context': {'client': client}, 'continuation': continuation},
+                timeout=10,
+            )
+            
+            if response.status_code != 200:
+                print(f"❌ HTTP ошибка {response.status_code}")
+                return None
+            
+            return response.json()
             
         except Exception as e:
             print(f"❌ Ошибка загрузки: {e}")
             return None
     
-    def scan_channel(self, channel_url: str, depth: int = 20) -> Dict:
+    def _parse_initial_data_selective(self, html: str, extra_keys: Tuple[str, ...] = ()) -> Optional[Dict]:
+        """Выборочно разбирает ytInitialData: только поддеревья SELECTIVE_PARSE_KEYS"""
+        match = re.search(r'ytInitialData"?\]?\s*=\s*(?=\{)', html)
+        if not match:
+            return None
+        
+        end = html.find(';</script>', match.end())
+        
+        parser = self._selective_parsers.get(extra_keys)
+        if parser is None:
+            parser = SelectiveJsonParser(SELECTIVE_PARSE_KEYS + extra_keys)
+            self._selective_parsers[extra_keys] = parser
+        
+        fragments = parser.parse(html, match.end(), end if end != -1 else None)
+        return {'fragments': fragments}
+    
+    def _parse_player_response(self, html: str) -> Optional[Dict]:
+        """Достаёт ytInitialPlayerResponse из HTML"""
+        match = re.search(r'ytInitialPlayerResponse\s*=\s*\{', html)
+        if not match:
+            return None
+        
+        try:
+            # raw_decode останавливается ровно на конце объекта
+            data, _ = json.JSONDecoder().raw_decode(html, match.end() - 1)
+            return data
+        except ValueError:
+            return None
+    
+    def scan_channel(self, channel_url: str, depth: int = 20, comments_limit: int = 0,
+                     comments_dir: str = 'comments') -> Dict:
         """Полное сканирование канала"""
         print(f"\n🔍 Начинаем сканирование канала...")
         
@@ -166,32 +1199,37 @@ class YouTubeAdvancedScanner:
             channel_data.update(channel_info)
             channel_data['success'] = True
             
-            # Шаг 2: Получаем список видео
-            print("🎬 Ищем видео на канале...")
-            videos = self.get_channel_videos(channel_url, max_videos=depth)
+            # Шаг 2-3: Вкладки видео, Shorts и трансляций перечисляются параллельно,
+            # а общий поток сразу уходит на детальный анализ
+            print("🎬 Перебираем видео, Shorts и трансляции канала...")
+            videos = self.iter_channel_videos(channel_url)
+            if depth > 0:
+                videos = islice(videos, depth)
+            
+            print("\n📈 Анализируем каждое видео...")
+            videos = self.fetch_details_stage(videos, comments=comments_limit > 0)
             
             if videos:
-                print(f"📊 Найдено {len(videos)} видео")
+                by_tab = {}
+                for video in videos:
+                    tab = video.get('tab', 'home')
+                    by_tab[tab] = by_tab.get(tab, 0) + 1
+                tabs = ', '.join(f"{tab}: {count}" for tab, count in by_tab.items())
+                print(f"📊 Найдено {len(videos)} видео ({tabs})")
                 channel_data['videos'] = videos
                 
-                # Шаг 3: Детальный анализ каждого видео
-                print("\n📈 Анализируем каждое видео...")
-                for i, video in enumerate(videos, 1):
-                    print(f"  [{i}/{len(videos)}] Анализ: {video.get('title', 'Без названия')[:40]}...")
-                    
-                    video_details = self.get_video_details(video['id'])
-                    if video_details:
-                        video.update(video_details)
-                    
-                    # Небольшая пауза чтобы не получить блокировку
-                    if i % 5 == 0:
-                        time.sleep(1)
+                # Шаг 3.5: Сбор комментариев (по желанию)
+                if comments_limit > 0:
+                    self.harvest_comments_stage(videos, comments_dir, comments_limit)
             
             # Шаг 4: Собираем общую статистику
             print("\n📊 Собираем общую статистику...")
             total_stats = self.calculate_total_stats(channel_data['videos'])
             channel_data['total_stats'] = total_stats
             
+            self.record_snapshots(channel_data['videos'], channel_id=channel_data.get('id'))
+            self.attach_analytics(channel_data, channel=self.channel_key(channel_data.get('id')))
+            
             print(f"\n✅ Сканирование завершено!")
             print(f"   📺 Видео проанализировано: {len(channel_data['videos'])}")
             print(f"   👍 Всего лайков: {total_stats.get('total_likes', 0):,}")
@@ -204,6 +1242,47 @@ class YouTubeAdvancedScanner:
         
         return channel_data
     
+    def fetch_details_stage(self, videos: Iterable[Dict], total: Optional[int] = None,
+                            comments: bool = False) -> List[Dict]:
+        """Стадия загрузки деталей: лениво потребляет поток видео, без повторных загрузок.
+        
+        comments=True - заодно запомнить начало ленты комментариев для harvest_comments_stage.
+        """
+        processed = []
+        fetched = 0
+        
+        for i, video in enumerate(videos, 1):
+            progress = f"{i}/{total}" if total else str(i)
+            
+            seen, cached = self.dedup.lookup(video['id'])
+            if seen:
+                print(f"  [{progress}] Уже загружено: {video.get('title', 'Без названия')[:40]}")
+                if cached is not None:
+                    video.update(cached)
+                    # Показатели из кэша не новые - в снимки роста они не пишутся
+                    video['cached'] = True
+                else:
+                    video['duplicate'] = True
+                processed.append(video)
+                continue
+            
+            print(f"  [{progress}] Анализ: {video.get('title', 'Без названия')[:40]}...")
+            
+            video_details, channel_info = self._fetch_video_page(video['id'], comments=comments)
+            if video_details:
+                video.update(video_details)
+                # В кэш - вместе с владельцем, как в scan_video
+                record = dict(video_details, channel=channel_info) if channel_info else video_details
+                self.dedup.add(video['id'], record)
+            processed.append(video)
+            fetched += 1
+            
+            # Небольшая пауза чтобы не получить блокировку
+            if fetched % 5 == 0:
+                time.sleep(1)
+        
+        return processed
+    
     def get_channel_info(self, url: str) -> Dict:
         """Получает базовую информацию о канале"""
         json_data = self.get_page_json(url)
@@ -214,22 +1293,9 @@ class YouTubeAdvancedScanner:
         info = {'success': True}
         
         try:
-            # Ищем метаданные канала
-            paths_to_check = [
-                ['metadata', 'channelMetadataRenderer'],
-                ['header', 'c4TabbedHeaderRenderer'],
-            ]
-            
-            for path in paths_to_check:
-                data = self._find_in_structure(json_data, path)
-                if data:
-                    if 'title' in data:
-                        info['name'] = data['title']
-                    if 'description' in data:
-                        info['description'] = data['description']
-                    if 'subscriberCountText' in data:
-                        info['subscribers'] = data['subscriberCountText'].get('simpleText', '')
-                    break
+            # Метаданные канала по схеме извлечения (один проход по дереву)
+            anchors, _ = self.extraction.scan(json_data)
+            info.update(self.extraction.extract('channel', anchors))
             
             # Если не нашли в обычных местах, ищем в тексте
             if 'name' not in info:
@@ -240,72 +1306,209 @@ class YouTubeAdvancedScanner:
                     info['name'] = title
             
             # Ищем статистику
-            self._extract_channel_stats(json_data, info)
+            self._extract_channel_stats(info)
             
         except Exception as e:
             info['parse_error'] = str(e)
         
         return info
     
-    def _extract_channel_stats(self, json_data: Dict, info: Dict):
-        """Извлекает статистику канала из JSON"""
-        # Ищем количество видео
-        video_text = self._search_in_structure(json_data, 'видео')
-        if video_text:
-            match = re.search(r'(\d+)\s*видео', video_text, re.IGNORECASE)
-            if match:
-                info['video_count'] = int(match.group(1))
+    def _extract_channel_stats(self, info: Dict):
+        """Приводит числовую статистику канала к int (без привязки к языку).
+        
+        Чистое число ("1,234") берётся как есть, подпись с единицей ("1 234 видео",
+        "1,234 subscribers") - если число в ней не сокращено.
+        """
+        if 'video_count' in info:
+            video_count = self._parse_label_count(info.pop('video_count'))
+            if video_count is not None:
+                info['video_count'] = video_count
+        
+        if 'subscribers' in info:
+            subscriber_count = self._parse_label_count(info['subscribers'])
+            if subscriber_count is not None:
+                info['subscriber_count'] = subscriber_count
+    
+    def _parse_label_count(self, text) -> Optional[int]:
+        """Число из счётчика или его подписи; None для сокращённых значений"""
+        count = self._parse_count(text, exact=True)
+        if count is None and text and not ABBREVIATED_COUNT.search(str(text)):
+            count = self._parse_count(text)
+        return count
+    
+    def _parse_count(self, text, exact: bool = False) -> Optional[int]:
+        """Достаёт целое число из текста с любыми разделителями разрядов.
+        
+        exact=True - текст должен быть только числом ("1,234", "1 234"),
+        иначе берётся первое число из подписи ("1.234 likes").
+        """
+        if isinstance(text, int):
+            return text
+        if not text:
+            return None
         
-        # Ищем подписчиков
-        sub_text = self._search_in_structure(json_data, 'подписчик')
-        if sub_text:
-            match = re.search(r'([\d\s,]+)\s*подписчик', sub_text, re.IGNORECASE)
-            if match:
-                info['subscribers'] = match.group(1).strip()
+        text = str(text).strip()
+        if exact:
+            if not re.fullmatch(r"\d[\d\s\u00a0\u202f,.']*", text):
+                return None
+            return int(re.sub(r'\D', '', text))
+        
+        match = re.search(r"\d(?:[\d\s\u00a0\u202f,.']*\d)?", text)
+        if match:
+            return int(re.sub(r'\D', '', match.group(0)))
+        return None
     
     def get_channel_videos(self, url: str, max_videos: int = 50) -> List[Dict]:
-        """Получает список видео с канала"""
+        """Получает список видео с канала (все вкладки, от новых к старым)"""
         videos = []
         
         try:
-            # Получаем первую страницу
-            json_data = self.get_page_json(url)
-            if not json_data:
-                return videos
-            
-            # Ищем видео в контенте
-            video_items = self._find_video_items(json_data)
-            
-            for item in video_items[:max_videos]:
-                video = self._parse_video_item(item)
-                if video:
-                    videos.append(video)
-            
+            videos = list(islice(self.iter_channel_videos(url), max_videos))
         except Exception as e:
             print(f"Ошибка получения видео: {e}")
         
         return videos
     
-    def _find_video_items(self, data) -> List:
-        """Рекурсивно ищет элементы видео в структуре"""
-        items = []
+    def _channel_base_url(self, url: str) -> Optional[str]:
+        """Корневой URL канала без вкладки"""
+        key = self.canonical_key(url)
+        if not key or not key.startswith('channel:'):
+            return None
+        
+        path = key.split(':', 1)[1]
+        if path.startswith('UC'):
+            path = f"channel/{path}"
+        return f"https://www.youtube.com/{path}"
+    
+    def iter_channel_videos(self, url: str, tabs: Tuple[str, ...] = CHANNEL_TABS) -> Iterator[Dict]:
+        """Лениво перебирает вкладки канала параллельно и отдаёт один поток без дубликатов.
+        
+        Каждая вкладка листается в своём потоке и передаёт видео целыми страницами.
+        Первые страницы всех вкладок грузятся сразу и параллельно, а следующая
+        страница вкладки - только по запросу, когда предыдущая полностью разобрана.
+        Потоки сливаются по дате публикации, от новых к старым.
+        """
+        base = self._channel_base_url(url)
+        if base is None:
+            yield from self._iter_root_videos(url)
+            return
+        
+        stop = threading.Event()
+        pages = [Queue() for _ in tabs]
+        # Запросы страниц: по одному на первую страницу каждой вкладки
+        demands = [threading.Semaphore(1) for _ in tabs]
+        done = object()
+        
+        def produce(tab, queue, demand):
+            try:
+                tab_pages = self.iter_channel_tab(base, tab)
+                while True:
+                    demand.acquire()
+                    if stop.is_set():
+                        return
+                    page = next(tab_pages, None)
+                    if page is None:
+                        return
+                    queue.put(page)
+            except Exception as e:
+                print(f"⚠️ Вкладка {tab}: {e}")
+            finally:
+                queue.put(done)
+        
+        def consume(queue, demand):
+            while True:
+                page = queue.get()
+                if page is done:
+                    return
+                for video in page:
+                    yield parse_relative_age(video.get('published')), video
+                # Страница разобрана - просим следующую
+                demand.release()
+        
+        workers = [threading.Thread(target=produce, args=args, daemon=True)
+                   for args in zip(tabs, pages, demands)]
+        for worker in workers:
+            worker.start()
+        
+        seen = set()
+        try:
+            for video in merge_by_age([consume(queue, demand) for queue, demand in zip(pages, demands)]):
+                # Одно видео может попасть на несколько вкладок
+                if video['id'] in seen:
+                    continue
+                seen.add(video['id'])
+                yield video
+        finally:
+            stop.set()
+            for demand in demands:
+                demand.release()
+        
+        # Ни одна вкладка не отдала видео - разбираем главную страницу канала
+        if not seen:
+            yield from self._iter_root_videos(url)
+    
+    def iter_browse_pages(self, url: str) -> Iterator[Tuple[Dict, List[Dict]]]:
+        """Лениво листает browse-страницу (плейлист, вкладка канала): (якоря, элементы видео) по страницам"""
+        html = self._fetch_page(url)
+        if html is None:
+            return
+        
+        page = self._parse_initial_data(html)
+        config = self._parse_innertube_config(html)
+        del html
         
-        if isinstance(data, dict):
-            # Проверяем, является ли этот элемент видео
-            if 'videoId' in data and 'title' in data:
-                items.append(data)
+        while page:
+            anchors, items = self.extraction.scan(page, collect_items=True)
+            token = self.extraction.extract('browse', anchors).get('continuation')
+            yield anchors, items
             
-            # Рекурсивно ищем в значениях
-            for value in data.values():
-                if isinstance(value, (dict, list)):
-                    items.extend(self._find_video_items(value))
+            # Следующая страница - только когда текущая полностью отдана
+            page = self._innertube_post('browse', token, config) if token else None
+    
+    def iter_channel_tab(self, base_url: str, tab: str) -> Iterator[List[Dict]]:
+        """Лениво перебирает одну вкладку канала: список видео каждой страницы"""
+        for anchors, items in self.iter_browse_pages(f"{base_url}/{tab}"):
+            videos = []
+            for item in items:
+                video = self._parse_video_item(item)
+                if video:
+                    videos.append(video)
+            
+            for key in SHORTS_ITEM_KEYS:
+                for item in anchors.get(key, ()):
+                    video = self._parse_short_item(item)
+                    if video:
+                        videos.append(video)
+            
+            for video in videos:
+                video['tab'] = tab
+            yield videos
+    
+    def _iter_root_videos(self, url: str) -> Iterator[Dict]:
+        """Видео, встроенные в главную страницу канала"""
+        json_data = self.get_page_json(url)
+        if not json_data:
+            return
         
-        elif isinstance(data, list):
-            for item in data:
-                if isinstance(item, (dict, list)):
-                    items.extend(self._find_video_items(item))
+        _, video_items = self.extraction.scan(json_data, collect_items=True)
+        for item in video_items:
+            video = self._parse_video_item(item)
+            if video:
+                yield video
+    
+    def _parse_short_item(self, item: Dict) -> Optional[Dict]:
+        """Парсит информацию о Shorts из reelItemRenderer / shortsLockupViewModel"""
+        short = self.extraction.extract_item('short_item', item)
+        video_id = short.pop('id', None)
+        if not video_id:
+            return None
         
-        return items
+        video = {
+            'id': video_id,
+            'url': f"https://youtube.com/shorts/{video_id}",
+        }
+        video.update(short)
+        return video
     
     def _parse_video_item(self, item: Dict) -> Optional[Dict]:
         """Парсит информацию о видео из элемента"""
@@ -314,99 +1517,152 @@ class YouTubeAdvancedScanner:
                 'id': item.get('videoId'),
                 'url': f"https://youtube.com/watch?v={item.get('videoId')}",
             }
+            video.update(self.extraction.extract_item('video_item', item))
+            return video
             
-            # Извлекаем заголовок
-            title_data = item.get('title', {})
-            if isinstance(title_data, dict):
-                runs = title_data.get('runs', [])
-                if runs:
-                    video['title'] = runs[0].get('text', '')
-                else:
-                    video['title'] = title_data.get('simpleText', '')
-            else:
-                video['title'] = str(title_data)
+        except Exception as e:
+            return None
+    
+    def scan_playlist(self, playlist_url: str, depth: int = 0, comments_limit: int = 0,
+                      comments_dir: str = 'comments') -> Dict:
+        """Сканирование плейлиста (depth=0 - все видео)"""
+        print(f"\n📃 Начинаем сканирование плейлиста...")
+        
+        playlist_data = {
+            'url': playlist_url,
+            'scan_time': datetime.now().isoformat(),
+            'type': 'playlist',
+            'videos': [],
+            'success': False
+        }
+        
+        playlist_id = self.extract_playlist_id_from_url(playlist_url)
+        if not playlist_id:
+            playlist_data['error'] = 'Не удалось извлечь ID плейлиста'
+            return playlist_data
+        
+        playlist_data['id'] = playlist_id
+        
+        try:
+            # Перечисление идёт лениво: страницы догружаются по мере обработки
+            print("🎬 Перебираем видео плейлиста...")
+            videos = self.iter_playlist_videos(playlist_id, info=playlist_data)
+            if depth > 0:
+                videos = islice(videos, depth)
             
-            # Извлекаем статистику
-            if 'viewCountText' in item:
-                view_data = item['viewCountText']
-                if isinstance(view_data, dict):
-                    video['views'] = view_data.get('simpleText', '')
+            playlist_data['videos'] = self.fetch_details_stage(videos, comments=comments_limit > 0)
             
-            if 'publishedTimeText' in item:
-                time_data = item['publishedTimeText']
-                if isinstance(time_data, dict):
-                    video['published'] = time_data.get('simpleText', '')
+            if comments_limit > 0:
+                self.harvest_comments_stage(playlist_data['videos'], comments_dir, comments_limit)
             
-            # Извлекаем длительность
-            if 'lengthText' in item:
-                length_data = item['lengthText']
-                if isinstance(length_data, dict):
-                    video['duration'] = length_data.get('simpleText', '')
+            playlist_data['success'] = 'name' in playlist_data or bool(playlist_data['videos'])
             
-            return video
+            print("\n📊 Собираем общую статистику...")
+            total_stats = self.calculate_total_stats(playlist_data['videos'])
+            playlist_data['total_stats'] = total_stats
+            
+            self.record_snapshots(playlist_data['videos'])
+            self.attach_analytics(playlist_data)
+            
+            print(f"\n✅ Сканирование завершено!")
+            print(f"   📺 Видео проанализировано: {len(playlist_data['videos'])}")
             
         except Exception as e:
-            return None
+            print(f"❌ Ошибка сканирования: {e}")
+            playlist_data['error'] = str(e)
+        
+        return playlist_data
+    
+    def iter_playlist_videos(self, playlist_id: str, info: Optional[Dict] = None) -> Iterator[Dict]:
+        """Лениво перебирает видео плейлиста страница за страницей"""
+        seen = set()
+        first_page = True
+        
+        for anchors, items in self.iter_browse_pages(f"https://www.youtube.com/playlist?list={playlist_id}"):
+            if first_page and info is not None:
+                playlist = self.extraction.extract('playlist', anchors)
+                video_count = self._parse_count(playlist.pop('video_count', None), exact=True)
+                if video_count is not None:
+                    playlist['video_count'] = video_count
+                info.update(playlist)
+            first_page = False
+            
+            for item in items:
+                video_id = item.get('videoId')
+                # Дубликаты внутри плейлиста отдаём один раз
+                if video_id in seen:
+                    continue
+                seen.add(video_id)
+                video = self._parse_video_item(item)
+                if video:
+                    yield video
     
-    def get_video_details(self, video_id: str) -> Dict:
+    def get_video_details(self, video_id: str, comments: bool = False) -> Dict:
         """Получает детальную информацию о видео"""
-        url = f"https://www.youtube.com/watch?v={video_id}"
-        json_data = self.get_page_json(url)
-        
+        details, _ = self._fetch_video_page(video_id, comments=comments)
+        return details
+    
+    def _fetch_video_page(self, video_id: str, comments: bool = False) -> Tuple[Dict, Optional[Dict]]:
+        """Загружает страницу видео: детали и информация о канале.
+        
+        comments=True - из той же страницы берутся токен ленты комментариев и параметры
+        клиента; они живут в _comment_starts до сбора, а не в деталях (и не в кэше dedup),
+        так как токены быстро устаревают.
+        """
+        html = self._fetch_page(f"https://www.youtube.com/watch?v={video_id}")
+        if html is None:
+            return {}, None
+        
+        json_data = self._parse_initial_data(html, extra_keys=('itemSectionRenderer',) if comments else ())
         if not json_data:
-            return {}
-        
+            return {}, None
+        
+        details, channel, token = self._extract_video_page(json_data)
+        if comments:
+            self._comment_starts[video_id] = (token, self._parse_innertube_config(html))
+        
+        # Запасной источник просмотров - player response той же страницы
+        if 'view_count' not in details:
+            player = self._parse_player_response(html)
+            if player:
+                player_info = self.extraction.extract_root('player', player)
+                view_count = self._parse_count(player_info.get('view_count'), exact=True)
+                if view_count is not None:
+                    details['view_count'] = view_count
+                    details.setdefault('views', f"{view_count:,}".replace(',', ' '))
+                if 'title' in player_info:
+                    details.setdefault('title', player_info['title'])
+        
+        return details, channel
+    
+    def _extract_video_page(self, json_data: Dict) -> Tuple[Dict, Optional[Dict], Optional[str]]:
+        """Извлекает детали видео, информацию о канале и токен комментариев за один проход"""
         details = {}
+        channel = None
+        token = None
         
         try:
-            # Ищем информацию о видео
-            video_data = self._find_video_primary_info(json_data)
-            
-            if video_data:
-                # Просмотры
-                if 'viewCount' in video_data:
-                    view_data = video_data['viewCount']
-                    if isinstance(view_data, dict):
-                        details['views'] = view_data.get('videoViewCountRenderer', {}).get('viewCount', {}).get('simpleText', '')
-                
-                # Лайки
-                if 'videoActions' in video_data:
-                    actions = video_data['videoActions']
-                    if 'menuRenderer' in actions:
-                        items = actions['menuRenderer'].get('topLevelButtons', [])
-                        for item in items:
-                            if 'segmentedLikeDislikeButtonRenderer' in item:
-                                like_data = item['segmentedLikeDislikeButtonRenderer']
-                                if 'likeButton' in like_data:
-                                    like_text = like_data['likeButton']['toggleButtonRenderer']['defaultText'].get('simpleText', '')
-                                    details['likes'] = like_text
-            
-            # Ищем комментарии
-            comments_count = self._find_comments_count(json_data)
-            if comments_count:
-                details['comments'] = comments_count
+            anchors, _ = self.extraction.scan(json_data)
+            details.update(self.extraction.extract('video', anchors))
+            channel = self.extraction.extract('video_owner', anchors) or None
+            token = self.extraction.extract('comments', anchors).get('continuation')
+            if channel and channel.get('id'):
+                details['channel_id'] = channel['id']
+            
+            # Числа из структурированных полей - без поиска по тексту на конкретном языке
+            for field, exact in (('view_count', True), ('comment_count', True), ('like_label', False)):
+                if field in details:
+                    value = self._parse_count(details.pop(field), exact=exact)
+                    if value is not None:
+                        details['like_count' if field == 'like_label' else field] = value
             
         except Exception as e:
             details['error'] = str(e)
         
-        return details
-    
-    def _find_video_primary_info(self, data) -> Optional[Dict]:
-        """Находит основную информацию о видео"""
-        return self._search_structure(data, 'videoPrimaryInfoRenderer')
-    
-    def _find_comments_count(self, data) -> Optional[str]:
-        """Находит количество комментариев"""
-        # Ищем текст с комментариями
-        comments_text = self._search_in_structure(data, 'комментари')
-        if comments_text:
-            match = re.search(r'([\d\s,]+)\s*комментари', comments_text, re.IGNORECASE)
-            if match:
-                return match.group(1).strip()
-        
-        return None
+        return details, channel, token
     
-    def scan_video(self, video_url: str) -> Dict:
+    def scan_video(self, video_url: str, comments_limit: int = 0,
+                   comments_dir: str = 'comments') -> Dict:
         """Сканирование одного видео"""
         print(f"\n🎬 Сканируем видео...")
         
@@ -424,17 +1680,29 @@ class YouTubeAdvancedScanner:
         }
         
         try:
-            # Получаем основную информацию
-            details = self.get_video_details(video_id)
-            video_data.update(details)
-            
-            # Получаем информацию о канале из видео
-            json_data = self.get_page_json(video_url)
-            if json_data:
-                # Ищем информацию о канале
-                channel_info = self._extract_channel_from_video(json_data)
+            seen, cached = self.dedup.lookup(video_id)
+            if seen:
+                print("♻️  Видео уже загружалось - берём сохранённые данные")
+                if cached is not None:
+                    video_data.update(cached)
+                    video_data['cached'] = True
+                else:
+                    video_data['duplicate'] = True
+            else:
+                # Детали видео и канал берём из одной загрузки страницы
+                details, channel_info = self._fetch_video_page(video_id, comments=comments_limit > 0)
+                video_data.update(details)
                 if channel_info:
                     video_data['channel'] = channel_info
+                if details:
+                    record = dict(details, channel=channel_info) if channel_info else details
+                    self.dedup.add(video_id, record)
+            
+            if comments_limit > 0:
+                self.harvest_comments_stage([video_data], comments_dir, comments_limit)
+            
+            self.record_snapshots([video_data])
+            self.attach_analytics(video_data)
             
             video_data['success'] = True
             
@@ -445,39 +1713,154 @@ class YouTubeAdvancedScanner:
         
         return video_data
     
-    def _extract_channel_from_video(self, json_data: Dict) -> Optional[Dict]:
-        """Извлекает информацию о канале из данных видео"""
-        try:
-            # Ищем информацию о канале в видео
-            channel_data = self._search_structure(json_data, 'videoOwnerRenderer')
-            if channel_data:
-                channel = {}
-                
-                # Название канала
-                if 'title' in channel_data:
-                    title_data = channel_data['title']
-                    if 'runs' in title_data:
-                        channel['name'] = title_data['runs'][0].get('text', '')
-                    elif 'simpleText' in title_data:
-                        channel['name'] = title_data['simpleText']
-                
-                # Подписчики
-                if 'subscriberCountText' in channel_data:
-                    sub_data = channel_data['subscriberCountText']
-                    if 'simpleText' in sub_data:
-                        channel['subscribers'] = sub_data['simpleText']
-                
-                # ID канала
-                if 'navigationEndpoint' in channel_data:
-                    nav = channel_data['navigationEndpoint']
-                    if 'browseEndpoint' in nav:
-                        channel['id'] = nav['browseEndpoint'].get('browseId')
+    def channel_key(self, channel_id: Optional[str]) -> Optional[str]:
+        """Ключ канала в снимках роста - всегда по UC-идентификатору, чем бы ни был задан канал"""
+        return f"channel:{channel_id}" if channel_id else None
+    
+    def resolve_channel_key(self, url: str) -> Optional[str]:
+        """Ключ канала для снимков по любой форме URL (@handle, /c/, /user/ - через страницу канала)"""
+        key = self.canonical_key(url)
+        if key and key.startswith('channel:UC'):
+            return key
+        return self.channel_key(self.get_channel_info(url).get('id'))
+    
+    def record_snapshots(self, videos: List[Dict], channel_id: Optional[str] = None):
+        """Сохраняет снимок показателей видео, загруженных в этом вызове (не из кэша), для аналитики роста.
+        
+        Канал строки - владелец со страницы видео, иначе channel_id (канал, который сканировался).
+        """
+        if not self.snapshots_path:
+            return
+        
+        now = time.time()
+        rows = [{
+            'ts': now,
+            'video_id': video['id'],
+            'channel': self.channel_key(video.get('channel_id') or channel_id),
+            'views': video['view_count'],
+            'likes': video.get('like_count'),
+            'comments': video.get('comment_count'),
+        } for video in videos
+            if isinstance(video.get('view_count'), int) and not video.get('duplicate') and not video.get('cached')]
+        
+        self.write_snapshots(rows)
+    
+    def write_snapshots(self, rows: List[Dict], path: Optional[str] = None):
+        """Дописывает строки снимков в файл; в файл аналитики - заодно и в загруженную аналитику"""
+        path = path or self.snapshots_path
+        append_snapshots(path, rows)
+        if (self._analytics is not None and self.snapshots_path
+                and os.path.abspath(path) == os.path.abspath(self.snapshots_path)):
+            for row in rows:
+                self._analytics.add(row)
+    
+    def get_analytics(self) -> Optional['GrowthAnalytics']:
+        """Аналитика по файлу снимков; файл читается один раз, дальше дополняется в памяти"""
+        if not self.snapshots_path:
+            return None
+        if self._analytics is None:
+            self._analytics = GrowthAnalytics.from_file(self.snapshots_path)
+        return self._analytics
+    
+    def attach_analytics(self, data: Dict, channel: Optional[str] = None):
+        """Добавляет к результатам скорость роста видео и сводку по снимкам"""
+        analytics = self.get_analytics()
+        if analytics is None:
+            return
+        
+        videos = data.get('videos', [data] if data.get('type') == 'video' else [])
+        for video in videos:
+            velocity = analytics.velocity(video.get('id'))
+            if velocity is not None:
+                video['views_per_hour'] = round(velocity, 1)
+        
+        if data.get('type') != 'video':
+            data['analytics'] = analytics.report(video_ids=[v['id'] for v in videos], channel=channel)
+    
+    def harvest_comments_stage(self, videos: List[Dict], output_dir: str = 'comments',
+                               max_per_video: int = 500, workers: int = 4):
+        """Стадия сбора комментариев: параллельно по видео, каждое пишется в свой JSONL"""
+        os.makedirs(output_dir, exist_ok=True)
+        print(f"\n💬 Собираем комментарии (до {max_per_video} на видео)...")
+        
+        def harvest(video):
+            path = os.path.join(output_dir, f"{video['id']}_comments.jsonl")
+            try:
+                count = self.harvest_video_comments(video['id'], path, max_per_video)
+                video['comments_file'] = path
+                video['comments_harvested'] = count
+            except Exception as e:
+                video['comments_error'] = str(e)
+        
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            list(pool.map(harvest, [v for v in videos if v.get('id')]))
+        
+        total = sum(v.get('comments_harvested', 0) for v in videos)
+        print(f"   💬 Собрано комментариев: {total:,}")
+    
+    def harvest_video_comments(self, video_id: str, path: str, max_comments: int = 500) -> int:
+        """Постранично выкачивает комментарии верхнего уровня в JSONL-файл"""
+        start = self._comment_starts.pop(video_id, None)
+        if start is None:
+            # Страница в этом запуске не загружалась (видео из кэша) - грузим её ради токена
+            self._fetch_video_page(video_id, comments=True)
+            start = self._comment_starts.pop(video_id, (None, None))
+        token, config = start
+        
+        count = 0
+        with open(path, 'w', encoding='utf-8') as f:
+            # В памяти держим только текущую страницу ответа
+            while token and count < max_comments:
+                page = self._innertube_post('next', token, config)
+                if not page:
+                    break
                 
-                return channel
-        except:
-            pass
+                comments, token = self._parse_comment_page(page)
+                for comment in comments[:max_comments - count]:
+                    comment['video_id'] = video_id
+                    f.write(json.dumps(comment, ensure_ascii=False) + '\n')
+                    count += 1
+                f.flush()
+        
+        return count
+    
+    def _parse_comment_page(self, page: Dict) -> Tuple[List[Dict], Optional[str]]:
+        """Разбирает страницу комментариев: список комментариев и следующий токен"""
+        items = []
+        for endpoint in page.get('onResponseReceivedEndpoints', []):
+            for action in ('reloadContinuationItemsCommand', 'appendContinuationItemsAction'):
+                items.extend(endpoint.get(action, {}).get('continuationItems', []))
+        
+        # Новая разметка хранит данные комментариев отдельно, в mutations
+        entities = {}
+        mutations = page.get('frameworkUpdates', {}).get('entityBatchUpdate', {}).get('mutations', [])
+        for mutation in mutations:
+            payload = mutation.get('payload', {}).get('commentEntityPayload')
+            if payload:
+                entities[mutation.get('entityKey')] = payload
+        
+        comments = []
+        next_token = None
+        for item in items:
+            if 'commentThreadRenderer' in item:
+                thread = item['commentThreadRenderer']
+                if 'comment' in thread:
+                    renderer = thread['comment'].get('commentRenderer', {})
+                    comment = self.extraction.extract_item('comment_renderer', renderer)
+                    runs = renderer.get('contentText', {}).get('runs', [])
+                    comment['text'] = ''.join(run.get('text', '') for run in runs)
+                else:
+                    view_model = thread.get('commentViewModel', {}).get('commentViewModel', {})
+                    payload = entities.get(view_model.get('commentKey'))
+                    if not payload:
+                        continue
+                    comment = self.extraction.extract_item('comment_entity', payload)
+                comments.append(comment)
+            elif 'continuationItemRenderer' in item:
+                next_token = self.extraction.extract_item(
+                    'continuation_item', item['continuationItemRenderer']).get('token')
         
-        return None
+        return comments, next_token
     
     def calculate_total_stats(self, videos: List[Dict]) -> Dict:
         """Вычисляет общую статистику по всем видео"""
@@ -490,7 +1873,9 @@ class YouTubeAdvancedScanner:
         
         for video in videos:
             # Просмотры
-            if 'views' in video and video['views']:
+            if isinstance(video.get('view_count'), int):
+                stats['total_views'] += video['view_count']
+            elif 'views' in video and video['views']:
                 views_text = video['views'].replace(' ', '').replace(',', '').replace('просмотр', '')
                 try:
                     if 'тыс' in views_text.lower():
@@ -504,7 +1889,9 @@ class YouTubeAdvancedScanner:
                     pass
             
             # Лайки
-            if 'likes' in video and video['likes']:
+            if isinstance(video.get('like_count'), int):
+                stats['total_likes'] += video['like_count']
+            elif 'likes' in video and video['likes']:
                 likes_text = video['likes'].replace(' ', '').replace(',', '')
                 try:
                     if 'тыс' in likes_text.lower():
@@ -518,7 +1905,9 @@ class YouTubeAdvancedScanner:
                     pass
             
             # Комментарии
-            if 'comments' in video and video['comments']:
+            if isinstance(video.get('comment_count'), int):
+                stats['total_comments'] += video['comment_count']
+            elif 'comments' in video and video['comments']:
                 comments_text = video['comments'].replace(' ', '').replace(',', '')
                 try:
                     if 'тыс' in comments_text.lower():
@@ -545,9 +1934,14 @@ class YouTubeAdvancedScanner:
         
         if data['type'] == 'channel':
             self._display_channel_results(data)
+        elif data['type'] == 'playlist':
+            self._display_playlist_results(data)
         elif data['type'] == 'video':
             self._display_video_results(data)
         
+        if 'analytics' in data:
+            self._display_analytics(data['analytics'])
+        
         print("═" * 70)
     
     def _display_channel_results(self, data: Dict):
@@ -570,6 +1964,21 @@ class YouTubeAdvancedScanner:
             for line in wrapped.split('\n'):
                 print(f"   {line}")
         
+        self._display_videos_summary(data, "🎥 ПОСЛЕДНИЕ ВИДЕО:")
+    
+    def _display_playlist_results(self, data: Dict):
+        """Отображает результаты сканирования плейлиста"""
+        print("📃 РЕЗУЛЬТАТЫ СКАНИРОВАНИЯ ПЛЕЙЛИСТА")
+        print("═" * 70)
+        
+        print(f"\n📃 ПЛЕЙЛИСТ: {data.get('name', 'Неизвестно')}")
+        print(f"🔗 URL: {data.get('url')}")
+        print(f"🎬 Видео в плейлисте: {data.get('video_count', len(data.get('videos', [])))}")
+        
+        self._display_videos_summary(data, "🎥 ПЕРВЫЕ ВИДЕО:")
+    
+    def _display_videos_summary(self, data: Dict, videos_title: str):
+        """Общая статистика и первые 5 видео для канала или плейлиста"""
         # Общая статистика
         if 'total_stats' in data:
             stats = data['total_stats']
@@ -581,7 +1990,7 @@ class YouTubeAdvancedScanner:
         
         # Детали по видео (первые 5)
         if 'videos' in data and data['videos']:
-            print(f"\n🎥 ПОСЛЕДНИЕ ВИДЕО:")
+            print(f"\n{videos_title}")
             for i, video in enumerate(data['videos'][:5], 1):
                 title = video.get('title', 'Без названия')
                 if len(title) > 40:
@@ -596,6 +2005,9 @@ class YouTubeAdvancedScanner:
                 if 'views' in video:
                     print(f"      👁️ Просмотры: {video['views']}")
                 
+                if 'views_per_hour' in video:
+                    print(f"      🚀 Скорость: {video['views_per_hour']:,} просмотров/час")
+                
                 if 'likes' in video:
                     print(f"      👍 Лайки: {video.get('likes', 'Нет данных')}")
                 
@@ -604,6 +2016,9 @@ class YouTubeAdvancedScanner:
                 
                 if 'duration' in video:
                     print(f"      ⏱️ Длительность: {video.get('duration')}")
+                
+                if 'comments_file' in video:
+                    print(f"      🗂️ Комментарии сохранены: {video['comments_harvested']} → {video['comments_file']}")
     
     def _display_video_results(self, data: Dict):
         """Отображает результаты сканирования видео"""
@@ -624,9 +2039,15 @@ class YouTubeAdvancedScanner:
         
         print(f"\n📊 СТАТИСТИКА ВИДЕО:")
         
+        if data.get('duplicate'):
+            print("   ♻️ Уже сканировалось ранее, детали не сохранялись")
+        
         if 'views' in data:
             print(f"   👁️ Просмотры: {data['views']}")
         
+        if 'views_per_hour' in data:
+            print(f"   🚀 Скорость: {data['views_per_hour']:,} просмотров/час")
+        
         if 'likes' in data:
             print(f"   👍 Лайки: {data.get('likes', 'Нет данных')}")
         
@@ -638,13 +2059,51 @@ class YouTubeAdvancedScanner:
         
         if 'duration' in data:
             print(f"   ⏱️ Длительность: {data['duration']}")
+        
+        if 'comments_file' in data:
+            print(f"   🗂️ Комментарии сохранены: {data['comments_harvested']} → {data['comments_file']}")
+    
+    def _display_analytics(self, analytics: Dict):
+        """Отображает сводку аналитики роста"""
+        print(f"\n🚀 ДИНАМИКА (снимков: {analytics.get('snapshots', 0):,}):")
+        
+        if analytics.get('trending'):
+            print("   🔥 Быстрее всего растут:")
+            for item in analytics['trending']:
+                print(f"      {item['video_id']}: {item['views_per_hour']:,} просмотров/час")
+        
+        if analytics.get('anomalies'):
+            print("   ⚡ Всплески:")
+            for item in analytics['anomalies']:
+                print(f"      {item['video_id']} ({item['time']}): {item['views_per_hour']:,}/час "
+                      f"при обычных {item['usual_views_per_hour']:,}/час, z={item['z_score']}")
+        
+        if analytics.get('channel_growth'):
+            print("   📈 Рост канала:")
+            for point in analytics['channel_growth'][-7:]:
+                print(f"      {point['time']}: {point['views']:,}")
+        
+        if not analytics.get('trending') and not analytics.get('channel_growth'):
+            print("   Недостаточно снимков - нужны минимум два сканирования")
+    
+    def display_extraction_stats(self):
+        """Показывает долю успешных извлечений по полям схемы"""
+        print("\n🧩 СТАТИСТИКА ИЗВЛЕЧЕНИЯ ПОЛЕЙ:")
+        for field, stat in self.extraction.hit_rates().items():
+            total = stat['hits'] + stat['misses']
+            if not total:
+                continue
+            print(f"   {field}: {stat['hit_rate']:.0%} ({stat['hits']}/{total})")
+            for path, count in stat['by_path'].items():
+                if count:
+                    print(f"      ↳ {count} × {path}")
     
     def save_results(self, data: Dict, format: str = 'txt'):
         """Сохраняет результаты в файл"""
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
-        if data['type'] == 'channel':
-            filename = f"youtube_channel_scan_{timestamp}.{format}"
+        if data['type'] in ('channel', 'playlist'):
+            filename = f"youtube_{data['type']}_scan_{timestamp}.{format}"
         else:
             filename = f"youtube_video_scan_{timestamp}.{format}"
         
@@ -667,8 +2126,8 @@ class YouTubeAdvancedScanner:
             f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
             f.write("=" * 70 + "\n\n")
             
-            if data['type'] == 'channel':
-                f.write(f"CHANNEL: {data.get('name', 'Unknown')}\n")
+            if data['type'] in ('channel', 'playlist'):
+                f.write(f"{data['type'].upper()}: {data.get('name', 'Unknown')}\n")
                 f.write(f"URL: {data.get('url')}\n")
                 f.write(f"Subscribers: {data.get('subscribers', 'N/A')}\n")
                 f.write(f"Total Videos: {len(data.get('videos', []))}\n\n")
@@ -694,6 +2153,8 @@ class YouTubeAdvancedScanner:
                             f.write(f"   Published: {video['published']}\n")
                         if 'views' in video:
                             f.write(f"   Views: {video['views']}\n")
+                        if 'views_per_hour' in video:
+                            f.write(f"   Views/hour: {video['views_per_hour']}\n")
                         if 'likes' in video:
                             f.write(f"   Likes: {video.get('likes', 'N/A')}\n")
                         if 'comments' in video:
@@ -716,6 +2177,8 @@ class YouTubeAdvancedScanner:
                 f.write("VIDEO STATISTICS:\n")
                 if 'views' in data:
                     f.write(f"- Views: {data['views']}\n")
+                if 'views_per_hour' in data:
+                    f.write(f"- Views/hour: {data['views_per_hour']}\n")
                 if 'likes' in data:
                     f.write(f"- Likes: {data.get('likes', 'N/A')}\n")
                 if 'comments' in data:
@@ -724,18 +2187,30 @@ class YouTubeAdvancedScanner:
                     f.write(f"- Published: {data['published']}\n")
                 if 'duration' in data:
                     f.write(f"- Duration: {data['duration']}\n")
+            
+            if 'analytics' in data:
+                analytics = data['analytics']
+                f.write("\nGROWTH ANALYTICS:\n")
+                f.write(f"- Snapshots: {analytics.get('snapshots', 0)}\n")
+                for item in analytics.get('trending', []):
+                    f.write(f"- Trending: {item['video_id']} {item['views_per_hour']} views/hour\n")
+                for item in analytics.get('anomalies', []):
+                    f.write(f"- Spike: {item['video_id']} at {item['time']}: {item['views_per_hour']} views/hour "
+                            f"(usual {item['usual_views_per_hour']}, z={item['z_score']})\n")
+                for point in analytics.get('channel_growth', []):
+                    f.write(f"- Channel views {point['time']}: {point['views']}\n")
     
     def _save_csv(self, data: Dict, filename: str):
         """Сохраняет результаты в CSV файл"""
         with open(filename, 'w', encoding='utf-8', newline='') as f:
             writer = csv.writer(f)
             
-            if data['type'] == 'channel':
-                # Заголовок канала
-                writer.writerow(['YOUTUBE CHANNEL SCAN RESULTS'])
+            if data['type'] in ('channel', 'playlist'):
+                # Заголовок канала / плейлиста
+                writer.writerow([f"YOUTUBE {data['type'].upper()} SCAN RESULTS"])
                 writer.writerow([f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"])
                 writer.writerow([])
-                writer.writerow(['CHANNEL INFORMATION'])
+                writer.writerow([f"{data['type'].upper()} INFORMATION"])
                 writer.writerow(['Name', 'URL', 'Subscribers', 'Total Videos'])
                 writer.writerow([
                     data.get('name', ''),
@@ -747,7 +2222,7 @@ class YouTubeAdvancedScanner:
                 
                 if 'videos' in data and data['videos']:
                     writer.writerow(['VIDEOS DETAILS'])
-                    writer.writerow(['#', 'Title', 'URL', 'Published', 'Views', 'Likes', 'Comments', 'Duration'])
+                    writer.writerow(['#', 'Title', 'URL', 'Published', 'Views', 'Likes', 'Comments', 'Duration', 'Views/hour'])
                     
                     for i, video in enumerate(data['videos'], 1):
                         writer.writerow([
@@ -758,74 +2233,552 @@ class YouTubeAdvancedScanner:
                             video.get('views', ''),
                             video.get('likes', ''),
                             video.get('comments', ''),
-                            video.get('duration', '')
+                            video.get('duration', ''),
+                            video.get('views_per_hour', '')
                         ])
+                
+                if 'analytics' in data:
+                    analytics = data['analytics']
+                    writer.writerow([])
+                    writer.writerow(['GROWTH ANALYTICS'])
+                    writer.writerow(['Kind', 'Video ID / Time', 'Views/hour / Views', 'Usual views/hour', 'Z-score'])
+                    for item in analytics.get('trending', []):
+                        writer.writerow(['trending', item['video_id'], item['views_per_hour'], '', ''])
+                    for item in analytics.get('anomalies', []):
+                        writer.writerow(['spike', item['video_id'], item['views_per_hour'],
+                                         item['usual_views_per_hour'], item['z_score']])
+                    for point in analytics.get('channel_growth', []):
+                        writer.writerow(['channel_growth', point['time'], point['views'], '', ''])
+
+def append_snapshots(path: str, rows: List[Dict]):
+    """Дописывает снимки показателей видео в JSONL-файл"""
+    if not rows:
+        return
+    with open(path, 'a', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+
+class GrowthAnalytics:
+    """Аналитика роста по накопленным снимкам (строки snapshots.jsonl).
     
-    # Вспомогательные методы для поиска в структуре данных
-    def _find_in_structure(self, data, path):
-        """Находит данные по пути в структуре"""
-        if not path:
-            return data
-        
-        key = path[0]
-        
-        if isinstance(data, dict):
-            if key in data:
-                return self._find_in_structure(data[key], path[1:])
-            else:
-                for value in data.values():
-                    if isinstance(value, (dict, list)):
-                        result = self._find_in_structure(value, path)
-                        if result:
-                            return result
-        
-        elif isinstance(data, list):
-            if isinstance(key, int) and 0 <= key < len(data):
-                return self._find_in_structure(data[key], path[1:])
+    Время и просмотры лежат по столбцам в компактных array. Для каждого видео
+    и канала хранится array индексов его строк, упорядоченный по времени:
+    новый снимок добавляется в конец за O(1) (вставка - только для
+    запоздавших строк), поэтому метрики по конкретным видео и каналу считаются
+    по их собственным строкам, без пересортировки всей таблицы после скана.
+    Топы выбираются кучей (heapq), без полной сортировки результатов.
+    """
+
+    def __init__(self):
+        self.video_ids = []
+        self.channel_ids = []
+        self._video_index = {}
+        self._channel_index = {}
+        self._video_rows = []
+        self._channel_rows = []
+        self.video_col = array('l')
+        self.ts = array('d')
+        self.views = array('d')
+
+    @classmethod
+    def from_file(cls, path: str) -> 'GrowthAnalytics':
+        analytics = cls()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        analytics.add(json.loads(line))
+                    except ValueError:
+                        continue
+        return analytics
+
+    def _intern(self, value, values: List, index: Dict, rows: List) -> int:
+        if value not in index:
+            index[value] = len(values)
+            values.append(value)
+            rows.append(array('l'))
+        return index[value]
+
+    def _insert_by_time(self, rows: array, i: int):
+        """Вставляет строку i с сохранением порядка по времени (обычно - в конец)"""
+        ts = self.ts
+        position = len(rows)
+        while position and ts[rows[position - 1]] > ts[i]:
+            position -= 1
+        rows.insert(position, i)
+
+    def add(self, row: Dict):
+        """Добавляет снимок {ts, video_id, channel, views, ...}; снимки без просмотров пропускаются"""
+        if row.get('views') is None or not row.get('video_id'):
+            return
+        i = len(self.ts)
+        self.ts.append(float(row['ts']))
+        self.views.append(float(row['views']))
+        
+        video = self._intern(row['video_id'], self.video_ids, self._video_index, self._video_rows)
+        self.video_col.append(video)
+        self._insert_by_time(self._video_rows[video], i)
+        if row.get('channel'):
+            channel = self._intern(row['channel'], self.channel_ids, self._channel_index, self._channel_rows)
+            self._insert_by_time(self._channel_rows[channel], i)
+
+    def _videos(self, video_ids: Optional[Iterable[str]]) -> Iterable[int]:
+        """Индексы запрошенных видео (None - все)"""
+        if video_ids is None:
+            return range(len(self.video_ids))
+        return [self._video_index[v] for v in dict.fromkeys(video_ids) if v in self._video_index]
+
+    def intervals(self, video: int) -> List[Tuple[float, float]]:
+        """Скорости (просмотров/час) между соседними снимками видео: [(время, скорость)]"""
+        ts, views = self.ts, self.views
+        series = []
+        rows = self._video_rows[video]
+        for prev, i in zip(rows, rows[1:]):
+            hours = (ts[i] - ts[prev]) / 3600
+            if hours > 0:
+                series.append((ts[i], (views[i] - views[prev]) / hours))
+        return series
+
+    def _velocity(self, video: int) -> Optional[float]:
+        """Скорость по последним двум снимкам с разным временем"""
+        ts, views = self.ts, self.views
+        rows = self._video_rows[video]
+        last = rows[-1] if rows else None
+        for position in range(len(rows) - 2, -1, -1):
+            prev = rows[position]
+            if ts[last] > ts[prev]:
+                return (views[last] - views[prev]) / ((ts[last] - ts[prev]) / 3600)
+        return None
+
+    def velocity(self, video_id: str) -> Optional[float]:
+        """Текущая скорость набора просмотров (просмотров/час) одного видео"""
+        if video_id not in self._video_index:
+            return None
+        return self._velocity(self._video_index[video_id])
+
+    def velocities(self) -> Dict[str, float]:
+        """Текущая скорость набора просмотров (просмотров/час) по всем видео"""
+        result = {}
+        for video in range(len(self.video_ids)):
+            velocity = self._velocity(video)
+            if velocity is not None:
+                result[self.video_ids[video]] = velocity
+        return result
+
+    def top_trending(self, n: int = 10, video_ids: Optional[Iterable[str]] = None) -> List[Dict]:
+        """Top-N видео по текущей скорости набора просмотров"""
+        candidates = ((self._velocity(video), video) for video in self._videos(video_ids))
+        top = heapq.nlargest(n, (item for item in candidates if item[0] is not None))
+        return [{'video_id': self.video_ids[video], 'views_per_hour': round(velocity, 1)}
+                for velocity, video in top]
+
+    def anomalies(self, n: int = 10, z_threshold: float = 3.0, min_history: int = 3,
+                  video_ids: Optional[Iterable[str]] = None) -> List[Dict]:
+        """Всплески: последняя скорость сильно выше обычной для этого же видео (z-оценка)"""
+        spikes = []
+        for video in self._videos(video_ids):
+            if len(self._video_rows[video]) <= min_history + 1:
+                continue
+            series = self.intervals(video)
+            if len(series) <= min_history:
+                continue
+            history = [velocity for _, velocity in series[:-1]]
+            mean = sum(history) / len(history)
+            std = math.sqrt(sum((v - mean) ** 2 for v in history) / len(history))
+            # Нижняя граница разброса, чтобы ровный ряд не давал бесконечных оценок
+            std = max(std, abs(mean) * 0.1, 1.0)
+            latest_ts, latest = series[-1]
+            z = (latest - mean) / std
+            if z >= z_threshold:
+                spikes.append((z, video, latest_ts, latest, mean))
+        
+        return [{
+            'video_id': self.video_ids[video],
+            'time': datetime.fromtimestamp(latest_ts).isoformat(timespec='minutes'),
+            'views_per_hour': round(latest, 1),
+            'usual_views_per_hour': round(mean, 1),
+            'z_score': round(z, 1),
+        } for z, video, latest_ts, latest, mean in heapq.nlargest(n, spikes)]
+
+    def channel_growth(self, channel: str, bucket_hours: float = 24) -> List[Dict]:
+        """Кривая роста канала: сумма последних известных просмотров его видео по интервалам"""
+        if channel not in self._channel_index:
+            return []
+        
+        rows = self._channel_rows[self._channel_index[channel]]
+        bucket_seconds = bucket_hours * 3600
+        
+        curve = []
+        latest = {}
+        total = 0.0
+        current_bucket = None
+        for i in rows:
+            bucket = int(self.ts[i] // bucket_seconds)
+            if current_bucket is not None and bucket != current_bucket:
+                curve.append((current_bucket, total))
+            current_bucket = bucket
+            video = self.video_col[i]
+            total += self.views[i] - latest.get(video, 0.0)
+            latest[video] = self.views[i]
+        if current_bucket is not None:
+            curve.append((current_bucket, total))
+        
+        return [{
+            'time': datetime.fromtimestamp(bucket * bucket_seconds).isoformat(timespec='minutes'),
+            'views': int(views),
+        } for bucket, views in curve]
+
+    def report(self, n: int = 5, video_ids: Optional[List[str]] = None,
+               channel: Optional[str] = None) -> Dict:
+        """Сводка для display_results и экспорта"""
+        report = {
+            'snapshots': len(self.ts),
+            'trending': self.top_trending(n, video_ids),
+            'anomalies': self.anomalies(n, video_ids=video_ids),
+        }
+        if channel:
+            report['channel_growth'] = self.channel_growth(channel)
+        return report
+
+
+class WatchlistScheduler:
+    """Демон мониторинга: очередь с приоритетом по времени следующего обновления.
+    
+    Интервал каждого видео подстраивается под наблюдаемый рост просмотров:
+    быстро растущие новинки опрашиваются часто, застывшие - редко. Каналы
+    опрашиваются чаще, пока на них появляются новые видео. Все запросы идут
+    через общий RequestBudget.
+    """
+
+    def __init__(self, scanner: YouTubeAdvancedScanner, budget: RequestBudget,
+                 snapshots_path: str = 'snapshots.jsonl', depth: int = 10,
+                 min_interval: float = 600, max_interval: float = 7 * 24 * 3600,
+                 target_growth: float = 0.02):
+        self.scanner = scanner
+        self.scanner.request_budget = budget
+        self.budget = budget
+        self.snapshots_path = snapshots_path
+        self.depth = depth
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        # Опрос, когда ожидаемый прирост просмотров достигнет этой доли
+        self.target_growth = target_growth
+        self.entries = {}
+        self._queue = []
+        self._seq = 0
+        self._stop = threading.Event()
+
+    def _schedule(self, key: str, delay: float):
+        self._seq += 1
+        heapq.heappush(self._queue, (time.time() + delay, self._seq, key))
+
+    def _clamp(self, interval: float) -> float:
+        return max(self.min_interval, min(self.max_interval, interval))
+
+    def add_channel(self, url: str):
+        key = self.scanner.canonical_key(url) or url
+        if key not in self.entries:
+            self.entries[key] = {'kind': 'channel', 'url': url, 'interval': self.min_interval,
+                                 'refreshed': False}
+            self._schedule(key, 0)
+
+    def add_video(self, video_id: str, channel: Optional[str] = None):
+        key = f"video:{video_id}"
+        if key not in self.entries:
+            self.entries[key] = {'kind': 'video', 'id': video_id, 'channel': channel,
+                                 'interval': self.min_interval, 'views': None,
+                                 'checked_at': None, 'rate': 0.0}
+            self._schedule(key, 0)
+
+    def load_watchlist(self, filename: str) -> int:
+        """Добавляет каналы и видео из файла (по одному URL в строке)"""
+        added = 0
+        report = IngestReport()
+        for kind, key, url in iter_ingested_urls(filename, report):
+            if kind == 'channel':
+                self.add_channel(url)
+                added += 1
+            elif kind == 'video':
+                self.add_video(key.split(':', 1)[1])
+                added += 1
+        if report.malformed:
+            report.display()
+        return added
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self, max_refreshes: Optional[int] = None):
+        """Основной цикл: берёт самую "просроченную" задачу и обновляет её"""
+        refreshes = 0
+        while self._queue and not self._stop.is_set():
+            due, _, key = self._queue[0]
+            wait = due - time.time()
+            if wait > 0:
+                # Просыпаемся не реже раза в минуту, чтобы реагировать на stop()
+                self._stop.wait(min(wait, 60))
+                continue
+            
+            heapq.heappop(self._queue)
+            entry = self.entries[key]
+            try:
+                if entry['kind'] == 'channel':
+                    self._refresh_channel(key, entry)
+                else:
+                    self._refresh_video(key, entry)
+            except Exception as e:
+                print(f"❌ Ошибка обновления {key}: {e}")
+            self._schedule(key, entry['interval'])
+            
+            refreshes += 1
+            if max_refreshes is not None and refreshes >= max_refreshes:
+                break
+
+    def _refresh_channel(self, key: str, entry: Dict):
+        """Ищет новые видео на канале; пока они появляются - опрашиваем чаще"""
+        videos = self.scanner.get_channel_videos(entry['url'], max_videos=self.depth)
+        new_videos = [v for v in videos if f"video:{v['id']}" not in self.entries]
+        for video in new_videos:
+            self.add_video(video['id'], channel=key)
+        
+        # Первый опрос видит "новыми" все видео канала - по нему интервал не меняем
+        if entry['refreshed']:
+            if new_videos:
+                entry['interval'] = self._clamp(entry['interval'] / 2)
             else:
-                for item in data:
-                    if isinstance(item, (dict, list)):
-                        result = self._find_in_structure(item, path)
-                        if result:
-                            return result
+                entry['interval'] = self._clamp(entry['interval'] * 1.5)
+        entry['refreshed'] = True
+        print(f"📺 {key}: новых видео {len(new_videos)}, следующий опрос через {entry['interval'] / 60:.0f} мин")
+
+    def _refresh_video(self, key: str, entry: Dict):
+        """Снимает показатели видео и пересчитывает интервал по скорости роста"""
+        details = self.scanner.get_video_details(entry['id'])
+        views = details.get('view_count')
+        now = time.time()
+        
+        if views is not None:
+            if entry['views'] is not None and now > entry['checked_at']:
+                hours = (now - entry['checked_at']) / 3600
+                rate = max(0.0, (views - entry['views']) / hours)
+                # Сглаживаем, чтобы один всплеск не обнулял интервал
+                entry['rate'] = 0.5 * entry['rate'] + 0.5 * rate if entry['rate'] else rate
+                
+                relative_rate = entry['rate'] / max(views, 1)
+                if relative_rate > 0:
+                    entry['interval'] = self._clamp(self.target_growth / relative_rate * 3600)
+                else:
+                    entry['interval'] = self._clamp(entry['interval'] * 2)
+            entry['views'] = views
+            entry['checked_at'] = now
+        else:
+            entry['interval'] = self._clamp(entry['interval'] * 2)
+            # Пустая загрузка - снимать нечего
+            return
         
-        return None
+        self.scanner.write_snapshots([{
+            'ts': now,
+            'video_id': entry['id'],
+            'channel': self.scanner.channel_key(details.get('channel_id')),
+            'views': views,
+            'likes': details.get('like_count'),
+            'comments': details.get('comment_count'),
+        }], self.snapshots_path)
+
+
+class SQLiteWorkQueue:
+    """Общая очередь заданий на SQLite с арендой (lease) - без координатора.
     
-    def _search_structure(self, data, key_to_find):
-        """Рекурсивно ищет ключ в структуре"""
-        if isinstance(data, dict):
-            if key_to_find in data:
-                return data[key_to_find]
-            for value in data.values():
-                if isinstance(value, (dict, list)):
-                    result = self._search_structure(value, key_to_find)
-                    if result:
-                        return result
-        elif isinstance(data, list):
-            for item in data:
-                if isinstance(item, (dict, list)):
-                    result = self._search_structure(item, key_to_find)
-                    if result:
-                        return result
-        return None
+    Воркеры открывают один файл базы, сами забирают задания, продлевают
+    аренду heartbeat-ом, а просроченные аренды любой воркер возвращает в
+    очередь при следующем захвате (или закрывает после max_attempts).
     
-    def _search_in_structure(self, data, search_text):
-        """Ищет текст в структуре"""
-        if isinstance(data, dict):
-            for key, value in data.items():
-                if isinstance(value, str) and search_text.lower() in value.lower():
-                    return value
-                elif isinstance(value, (dict, list)):
-                    result = self._search_in_structure(value, search_text)
-                    if result:
-                        return result
-        elif isinstance(data, list):
-            for item in data:
-                if isinstance(item, (dict, list)):
-                    result = self._search_in_structure(item, search_text)
-                    if result:
-                        return result
-        return None
+    По умолчанию журнал WAL - он быстрее, но требует общей памяти и работает
+    только для процессов одной машины. Для воркеров на разных машинах с файлом
+    на сетевом диске нужен shared_disk=True (журнал DELETE); надёжность и тогда
+    зависит от того, насколько корректно сетевая ФС реализует блокировки.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 300, max_attempts: int = 3,
+                 shared_disk: bool = False):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.journal_mode = 'DELETE' if shared_disk else 'WAL'
+        self._local = threading.local()
+        
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    key TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    owner TEXT,
+                    lease_until REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, attempts)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    worker TEXT NOT NULL,
+                    finished REAL NOT NULL,
+                    data TEXT NOT NULL
+                )""")
+
+    def _conn(self) -> sqlite3.Connection:
+        """Отдельное соединение на поток (sqlite3 не делит их между потоками)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            conn.execute(f"PRAGMA journal_mode={self.journal_mode}")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._conn()
+        # IMMEDIATE сразу берёт блокировку записи - захват атомарен между процессами
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def enqueue(self, jobs: Iterable[Tuple[str, str, str]], batch_size: int = 1000) -> int:
+        """Добавляет задания (тип, ключ, URL); уже известные ключи пропускаются"""
+        added = 0
+        jobs = iter(jobs)
+        for batch in iter(lambda: list(islice(jobs, batch_size)), []):
+            with self._transaction() as conn:
+                before = conn.total_changes
+                conn.executemany(
+                    "INSERT OR IGNORE INTO jobs (key, kind, url) VALUES (?, ?, ?)",
+                    [(key, kind, url) for kind, key, url in batch])
+                added += conn.total_changes - before
+        return added
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        """Забирает следующее задание в аренду; заодно возвращает просроченные"""
+        now = time.time()
+        with self._transaction() as conn:
+            # Задание, которое раз за разом "роняет" или вешает воркер, не должно ходить по кругу
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', owner = NULL, error = 'lease expired' "
+                "WHERE status = 'leased' AND lease_until < ? AND attempts >= ?", (now, self.max_attempts))
+            conn.execute(
+                "UPDATE jobs SET status = 'pending', owner = NULL "
+                "WHERE status = 'leased' AND lease_until < ?", (now,))
+            row = conn.execute(
+                "SELECT key, kind, url, attempts FROM jobs WHERE status = 'pending' "
+                "ORDER BY attempts, rowid LIMIT 1").fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'leased', owner = ?, lease_until = ?, attempts = attempts + 1 "
+                "WHERE key = ?", (worker_id, now + self.lease_seconds, row[0]))
+        return {'key': row[0], 'kind': row[1], 'url': row[2], 'attempts': row[3] + 1}
+
+    def heartbeat(self, key: str, worker_id: str) -> bool:
+        """Продлевает аренду; False - аренда потеряна (задание ушло другому)"""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE key = ? AND owner = ? AND status = 'leased'",
+                (time.time() + self.lease_seconds, key, worker_id))
+            return cursor.rowcount == 1
+
+    def complete(self, job: Dict, worker_id: str, data: Dict) -> bool:
+        """Сохраняет результат и закрывает задание; False - аренда потеряна, результат не записан"""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'done', owner = NULL, error = NULL "
+                "WHERE key = ? AND owner = ? AND status = 'leased'", (job['key'], worker_id))
+            if cursor.rowcount != 1:
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, kind, worker, finished, data) VALUES (?, ?, ?, ?, ?)",
+                (job['key'], job['kind'], worker_id, time.time(),
+                 json.dumps(data, ensure_ascii=False, default=str)))
+        return True
+
+    def fail(self, job: Dict, worker_id: str, error: str):
+        """Возвращает задание в очередь или помечает проваленным после max_attempts"""
+        status = 'failed' if job['attempts'] >= self.max_attempts else 'pending'
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, error = ? WHERE key = ? AND owner = ?",
+                (status, error, job['key'], worker_id))
+
+    def stats(self) -> Dict[str, int]:
+        rows = self._conn().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+
+class ScanWorker:
+    """Воркер: забирает задания из общей очереди и выполняет обычное сканирование"""
+
+    def __init__(self, scanner: YouTubeAdvancedScanner, queue: SQLiteWorkQueue,
+                 worker_id: Optional[str] = None, depth: int = 10, poll_interval: float = 5):
+        self.scanner = scanner
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.depth = depth
+        self.poll_interval = poll_interval
+        self.completed = 0
+
+    def _heartbeat_loop(self, job: Dict, done: threading.Event):
+        interval = max(1.0, self.queue.lease_seconds / 3)
+        while not done.wait(interval):
+            if not self.queue.heartbeat(job['key'], self.worker_id):
+                print(f"⚠️  Аренда {job['key']} потеряна")
+                return
+
+    def process(self, job: Dict) -> Dict:
+        if job['kind'] == 'channel':
+            return self.scanner.scan_channel(job['url'], depth=self.depth)
+        if job['kind'] == 'playlist':
+            return self.scanner.scan_playlist(job['url'], depth=self.depth)
+        return self.scanner.scan_video(job['url'])
+
+    def run(self, wait_for_leases: bool = True):
+        """Работает, пока в очереди есть задания (включая чужие аренды, которые могут истечь)"""
+        print(f"👷 Воркер {self.worker_id} запущен")
+        while True:
+            job = self.queue.claim(self.worker_id)
+            if job is None:
+                stats = self.queue.stats()
+                if wait_for_leases and stats.get('leased'):
+                    time.sleep(self.poll_interval)
+                    continue
+                break
+            
+            print(f"\n📥 [{self.worker_id}] {job['kind']}: {job['url']} (попытка {job['attempts']})")
+            done = threading.Event()
+            heartbeat = threading.Thread(target=self._heartbeat_loop, args=(job, done), daemon=True)
+            heartbeat.start()
+            try:
+                data = self.process(job)
+                if data.get('success'):
+                    if self.queue.complete(job, self.worker_id, data):
+                        self.completed += 1
+                    else:
+                        print(f"⚠️  Аренда {job['key']} истекла - результат отброшен")
+                else:
+                    self.queue.fail(job, self.worker_id, data.get('error', 'scan failed'))
+            except Exception as e:
+                self.queue.fail(job, self.worker_id, str(e))
+            finally:
+                done.set()
+                heartbeat.join()
+        
+        print(f"\n🏁 Воркер {self.worker_id}: выполнено заданий {self.completed}, очередь: {self.queue.stats()}")
+        self.scanner.egress.display_health()
+
 
 def main():
     print("=" * 70)
@@ -839,15 +2792,25 @@ def main():
     print("=" * 70)
     
     scanner = YouTubeAdvancedScanner()
+    scanner.snapshots_path = 'snapshots.jsonl'
     
     while True:
         print("\n📌 ГЛАВНОЕ МЕНЮ:")
         print("1. 🔍 Сканировать канал YouTube")
         print("2. 🎬 Сканировать одно видео")
         print("3. 📁 Сканировать несколько URL из файла")
-        print("4. ❌ Выход")
+        print("4. 📃 Сканировать плейлист")
+        print("5. ⏱️ Мониторинг списка каналов (демон)")
+        print("6. 🌐 Распределённое сканирование (общая очередь)")
+        print("7. 🚀 Аналитика роста по снимкам")
+        print("8. ❌ Выход")
         
-        choice = input("\nВаш выбор (1-4): ").strip()
+        choice = input("\nВаш выбор (1-8): ").strip()
+        
+        # Индекс загруженных видео живёт в пределах одного действия меню:
+        # повторное сканирование того же канала или видео получает свежие данные
+        if choice in ('1', '2', '3', '4'):
+            scanner.dedup = VideoDedupIndex()
         
         if choice == '1':
             url = input("\nВведите ссылку на канал YouTube: ").strip()
@@ -860,8 +2823,11 @@ def main():
                 depth = input("Сколько видео анализировать (по умолчанию 20): ").strip()
                 depth = int(depth) if depth.isdigit() else 20
                 
+                comments_limit = input("Сколько комментариев собирать с видео (0 - не собирать): ").strip()
+                comments_limit = int(comments_limit) if comments_limit.isdigit() else 0
+                
                 # Сканируем канал
-                data = scanner.scan_channel(url, depth=depth)
+                data = scanner.scan_channel(url, depth=depth, comments_limit=comments_limit)
                 
                 # Показываем результаты
                 scanner.display_results(data)
@@ -882,7 +2848,10 @@ def main():
                 url = scanner.normalize_url(url)
                 print(f"🔄 Анализируем видео: {url}")
                 
-                data = scanner.scan_video(url)
+                comments_limit = input("Сколько комментариев собирать (0 - не собирать): ").strip()
+                comments_limit = int(comments_limit) if comments_limit.isdigit() else 0
+                
+                data = scanner.scan_video(url, comments_limit=comments_limit)
                 scanner.display_results(data)
                 
                 if data.get('success'):
@@ -896,36 +2865,115 @@ def main():
             filename = input("\nВведите имя файла с URL (txt): ").strip()
             if filename:
                 try:
-                    with open(filename, 'r', encoding='utf-8') as f:
-                        urls = [line.strip() for line in f if line.strip()]
-                    
-                    print(f"\n📋 Найдено {len(urls)} URL для сканирования")
+                    index_path = input("Файл индекса просканированных видео (Enter - только в памяти, *.bloom - фильтр Блума): ").strip()
+                    if index_path:
+                        scanner.dedup = VideoDedupIndex(index_path, freshness_hours=24)
                     
-                    for i, url in enumerate(urls, 1):
-                        print(f"\n[{i}/{len(urls)}] Сканирование: {url}")
-                        url = scanner.normalize_url(url)
+                    # Файл читается потоково; один и тот же объект в разных формах URL
+                    # отсеивается ещё до сканирования
+                    report = IngestReport()
+                    for i, (url_type, key, url) in enumerate(iter_ingested_urls(filename, report), 1):
+                        # Пауза между запросами
+                        if i > 1:
+                            time.sleep(2)
+                        
+                        print(f"\n[{i}] Сканирование: {url}")
                         
-                        url_type = scanner.determine_url_type(url)
                         if url_type == 'channel':
                             data = scanner.scan_channel(url, depth=10)
                         elif url_type == 'video':
                             data = scanner.scan_video(url)
                         else:
-                            print("❌ Неподдерживаемый тип URL")
-                            continue
+                            data = scanner.scan_playlist(url, depth=10)
                         
                         scanner.display_results(data)
-                        
-                        # Пауза между запросами
-                        if i < len(urls):
-                            time.sleep(2)
+                    
+                    report.display()
+                    scanner.display_extraction_stats()
+                    print(f"\n♻️  Повторных загрузок видео избежано: {scanner.dedup.hits}")
+                    scanner.egress.display_health()
                     
                 except FileNotFoundError:
                     print("❌ Файл не найден!")
                 except Exception as e:
                     print(f"❌ Ошибка: {e}")
+                finally:
+                    # Индекс сохраняется и при прерванном прогоне
+                    scanner.dedup.close()
         
         elif choice == '4':
+            url = input("\nВведите ссылку на плейлист YouTube: ").strip()
+            if url:
+                url = scanner.normalize_url(url)
+                print(f"🔄 Анализируем плейлист: {url}")
+                
+                depth = input("Сколько видео анализировать (по умолчанию все): ").strip()
+                depth = int(depth) if depth.isdigit() else 0
+                
+                data = scanner.scan_playlist(url, depth=depth)
+                scanner.display_results(data)
+                
+                if data.get('success'):
+                    save = input("\n💾 Сохранить результаты? (да/нет): ").strip().lower()
+                    if save in ['да', 'д', 'y', 'yes']:
+                        format_choice = input("Формат (txt/csv): ").strip().lower()
+                        format_choice = format_choice if format_choice in ['txt', 'csv'] else 'txt'
+                        scanner.save_results(data, format_choice)
+            else:
+                print("⚠️ Введите ссылку!")
+        
+        elif choice == '5':
+            filename = input("\nВведите имя файла со списком каналов/видео (txt): ").strip()
+            if filename:
+                rate = input("Запросов в минуту (по умолчанию 30): ").strip()
+                rate = int(rate) if rate.isdigit() and int(rate) > 0 else 30
+                
+                scheduler = WatchlistScheduler(scanner, RequestBudget(requests_per_minute=rate))
+                try:
+                    added = scheduler.load_watchlist(filename)
+                    print(f"\n📋 В мониторинге: {added}. Снимки пишутся в {scheduler.snapshots_path}")
+                    print("   Остановка - Ctrl+C")
+                    scheduler.run()
+                except FileNotFoundError:
+                    print("❌ Файл не найден!")
+                except KeyboardInterrupt:
+                    print(f"\n⏹️ Мониторинг остановлен. Запросов сделано: {scheduler.budget.spent}")
+                finally:
+                    scanner.request_budget = None
+        
+        elif choice == '6':
+            db_path = input("\nФайл общей очереди (по умолчанию scan_queue.db): ").strip() or 'scan_queue.db'
+            shared = input("Файл на сетевом диске для нескольких машин? (да/нет): ").strip().lower()
+            queue = SQLiteWorkQueue(db_path, shared_disk=shared in ['да', 'д', 'y', 'yes'])
+            print("1. ➕ Добавить URL из файла в очередь")
+            print("2. 👷 Запустить воркер на этой машине")
+            print("3. 📊 Состояние очереди")
+            action = input("Действие (1-3): ").strip()
+            
+            if action == '1':
+                filename = input("Введите имя файла с URL (txt): ").strip()
+                try:
+                    report = IngestReport()
+                    added = queue.enqueue(iter_ingested_urls(filename, report))
+                    report.display()
+                    print(f"   ➕ Новых заданий в очереди: {added:,}")
+                except FileNotFoundError:
+                    print("❌ Файл не найден!")
+            elif action == '2':
+                ScanWorker(scanner, queue).run()
+            elif action == '3':
+                print(f"📊 {queue.stats()}")
+        
+        elif choice == '7':
+            analytics = scanner.get_analytics()
+            channel = input("\nКанал для кривой роста (Enter - пропустить): ").strip()
+            channel = scanner.resolve_channel_key(scanner.normalize_url(channel)) if channel else None
+            
+            print("\n" + "═" * 70)
+            scanner._display_analytics(analytics.report(n=10, channel=channel))
+            print("═" * 70)
+        
+        elif choice == '8':
             print("\n👋 До свидания!")
             break
         
@@ -944,4 +2992,26 @@ if __name__ == "__main__":
     # data = scanner.scan_video("youtube.com/watch?v=VIDEO_ID")
     # scanner.display_results(data)
     
+    # Несколько выходов (прокси/заголовки/cookies) - JSON-список для EgressPool:
+    # scanner = YouTubeAdvancedScanner(egress_config="egress.json")
+    # [{"name": "proxy-1", "proxy": "http://127.0.0.1:8081", "headers": {"User-Agent": "..."}}]
+    
+    # 3. Замер скорости приёма URL: python gg.py --bench-ingest [строк]
+    if len(sys.argv) > 1 and sys.argv[1] == '--bench-ingest':
+        benchmark_ingestion(int(sys.argv[2]) if len(sys.argv) > 2 else 5_000_000)
+        sys.exit(0)
+    
+    # Проверка пула выходов на локальных заглушках прокси: python gg.py --check-egress [запросов]
+    if len(sys.argv) > 1 and sys.argv[1] == '--check-egress':
+        check_egress(int(sys.argv[2]) if len(sys.argv) > 2 else 40)
+        sys.exit(0)
+    
+    # 4. Воркер общей очереди без меню:
+    #    python gg.py --worker scan_queue.db                (процессы одной машины)
+    #    python gg.py --worker /mnt/share/q.db --shared-disk (машины с общим сетевым диском)
+    if len(sys.argv) > 2 and sys.argv[1] == '--worker':
+        queue = SQLiteWorkQueue(sys.argv[2], shared_disk='--shared-disk' in sys.argv[3:])
+        ScanWorker(YouTubeAdvancedScanner(), queue).run()
+        sys.exit(0)
+    
     main()